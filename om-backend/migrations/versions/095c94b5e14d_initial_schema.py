@@ -0,0 +1,78 @@
+"""initial schema
+
+Revision ID: 095c94b5e14d
+Revises: 
+Create Date: 2026-10-19 18:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '095c94b5e14d'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('smart_locker_owner',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('did', sa.String(), nullable=True),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('address', sa.String(), nullable=True),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('url', sa.String(), nullable=True),
+    sa.Column('logo', sa.Text(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('authenticated', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('smart_locker',
+    sa.Column('id', sa.BIGINT(), nullable=False),
+    sa.Column('name', sa.Text(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('lat', sa.Float(), nullable=False),
+    sa.Column('lon', sa.Float(), nullable=False),
+    sa.Column('loc_description', sa.Text(), nullable=True),
+    sa.Column('icon_image', sa.Text(), nullable=False),
+    sa.Column('additional_images', sa.Text(), nullable=True),
+    sa.Column('lock_mechanism', sa.Text(), nullable=False),
+    sa.Column('owner_id', sa.String(), nullable=False),
+    sa.Column('chain_id', sa.Text(), nullable=True),
+    sa.Column('marketplace_smart_contract_address', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['owner_id'], ['smart_locker_owner.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('marketplace_request',
+    sa.Column('id', sa.BIGINT(), nullable=False),
+    sa.Column('start_time', sa.BIGINT(), nullable=False),
+    sa.Column('end_time', sa.BIGINT(), nullable=False),
+    sa.Column('auction_min_price_per_slot', sa.BIGINT(), nullable=False),
+    sa.Column('instant_rent_rules', sa.String(), nullable=True),
+    sa.Column('locker_id', sa.BIGINT(), nullable=False),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['locker_id'], ['smart_locker.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('marketplace_offer',
+    sa.Column('id', sa.BIGINT(), nullable=False),
+    sa.Column('start_time', sa.BIGINT(), nullable=True),
+    sa.Column('end_time', sa.BIGINT(), nullable=True),
+    sa.Column('offer_type', sa.BIGINT(), nullable=True),
+    sa.Column('price_offered', sa.BIGINT(), nullable=True),
+    sa.Column('offer_creator_encryption_key', sa.String(), nullable=True),
+    sa.Column('offer_creator_auth_key', sa.String(), nullable=True),
+    sa.Column('is_open', sa.BOOLEAN(), nullable=True),
+    sa.Column('request_id', sa.BIGINT(), nullable=False),
+    sa.ForeignKeyConstraint(['request_id'], ['marketplace_request.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('marketplace_offer')
+    op.drop_table('marketplace_request')
+    op.drop_table('smart_locker')
+    op.drop_table('smart_locker_owner')
@@ -0,0 +1,28 @@
+"""request and offer indexes
+
+Revision ID: 4e033a671326
+Revises: 095c94b5e14d
+Create Date: 2026-10-19 18:31:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e033a671326'
+down_revision = '095c94b5e14d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_smart_locker_owner_id', 'smart_locker', ['owner_id'], unique=False)
+    op.create_index('ix_marketplace_request_locker_id_status', 'marketplace_request', ['locker_id', 'status', 'id'], unique=False)
+    op.create_index('ix_marketplace_offer_request_id_offer_type', 'marketplace_offer', ['request_id', 'offer_type', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_marketplace_offer_request_id_offer_type', table_name='marketplace_offer')
+    op.drop_index('ix_marketplace_request_locker_id_status', table_name='marketplace_request')
+    op.drop_index('ix_smart_locker_owner_id', table_name='smart_locker')
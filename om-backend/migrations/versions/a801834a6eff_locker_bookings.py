@@ -0,0 +1,36 @@
+"""locker bookings
+
+Revision ID: a801834a6eff
+Revises: ed8ef1043086
+Create Date: 2026-10-19 18:34:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a801834a6eff'
+down_revision = 'ed8ef1043086'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('locker_booking',
+    sa.Column('offer_id', sa.BIGINT(), nullable=False),
+    sa.Column('request_id', sa.BIGINT(), nullable=False),
+    sa.Column('locker_id', sa.BIGINT(), nullable=False),
+    sa.Column('start_time', sa.BIGINT(), nullable=False),
+    sa.Column('end_time', sa.BIGINT(), nullable=False),
+    sa.ForeignKeyConstraint(['locker_id'], ['smart_locker.id'], ),
+    sa.ForeignKeyConstraint(['offer_id'], ['marketplace_offer.id'], ),
+    sa.ForeignKeyConstraint(['request_id'], ['marketplace_request.id'], ),
+    sa.PrimaryKeyConstraint('offer_id')
+    )
+    op.create_index('ix_locker_booking_locker_id_start_time', 'locker_booking', ['locker_id', 'start_time', 'end_time'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_locker_booking_locker_id_start_time', table_name='locker_booking')
+    op.drop_table('locker_booking')
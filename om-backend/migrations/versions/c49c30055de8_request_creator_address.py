@@ -0,0 +1,26 @@
+"""request creator address
+
+Revision ID: c49c30055de8
+Revises: 4e033a671326
+Create Date: 2026-10-19 18:32:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c49c30055de8'
+down_revision = '4e033a671326'
+branch_labels = None
+depends_on = None
+
+
+# The creator of the requests already stored is read from the smart contract by the dashboard, the first time it is needed.
+def upgrade():
+    op.add_column('marketplace_request', sa.Column('creator_address', sa.String(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('marketplace_request') as batch_op:
+        batch_op.drop_column('creator_address')
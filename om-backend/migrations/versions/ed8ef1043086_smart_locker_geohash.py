@@ -0,0 +1,38 @@
+"""smart locker geohash
+
+Revision ID: ed8ef1043086
+Revises: c49c30055de8
+Create Date: 2026-10-19 18:33:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from project.geo import encode_geohash
+
+
+# revision identifiers, used by Alembic.
+revision = 'ed8ef1043086'
+down_revision = 'c49c30055de8'
+branch_labels = None
+depends_on = None
+
+
+smart_locker = sa.table('smart_locker', sa.column('id', sa.BIGINT()), sa.column('lat', sa.Float()), sa.column('lon', sa.Float()), sa.column('geohash', sa.String()))
+
+
+def upgrade():
+    op.add_column('smart_locker', sa.Column('geohash', sa.String(), nullable=True))
+    op.create_index('ix_smart_locker_geohash', 'smart_locker', ['geohash'], unique=False)
+
+    # Computes the geohash of the lockers already stored.
+    connection = op.get_bind()
+    rows = connection.execute(sa.select([smart_locker.c.id, smart_locker.c.lat, smart_locker.c.lon])).fetchall()
+    if len(rows) > 0:
+        connection.execute(smart_locker.update().where(smart_locker.c.id == sa.bindparam('locker_id')).values(geohash=sa.bindparam('locker_geohash')),
+            [{'locker_id': locker_id, 'locker_geohash': encode_geohash(lat, lon)} for (locker_id, lat, lon) in rows])
+
+
+def downgrade():
+    op.drop_index('ix_smart_locker_geohash', table_name='smart_locker')
+    with op.batch_alter_table('smart_locker') as batch_op:
+        batch_op.drop_column('geohash')
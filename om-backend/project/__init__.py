@@ -11,9 +11,10 @@ def create_app(config=None) -> Flask:
     global app_config
     app_config = config
     app = _create_and_setup_flask_app(config)
-    from project import models, routes, web3
+    from project import models, routes, web3, json_response
     from flask_bootstrap import Bootstrap
     Bootstrap(app)
+    json_response.init_app(app)
     models.init_app(app)
     routes.init_app(app)
     web3.init_app(app)
@@ -35,7 +36,7 @@ def _configure_sl_schema(app: Flask):
     import urllib.parse, requests, json
     sr_endpoint = app.config.get("SR_ENDPOINT_URL")
     sr_path = urllib.parse.urljoin(sr_endpoint, "api/schema")
-    schema_file_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "SL_Schema.json"))       # No check whether the file actually exists or not
+    schema_file_path = app.config.get("SR_SCHEMA_PATH")       # No check whether the file actually exists or not
 
     with open(schema_file_path, "r") as sl_schema_file:
         sl_schema = json.load(sl_schema_file)
@@ -1,11 +1,16 @@
-import json, requests, time, datetime, jwt
+import json, requests, time, datetime, jwt, threading, urllib.parse, logging
 from flask import Flask, current_app as app
 from requests import Response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Tuple
 
 GRANT = 'DID'
 RESOURCE_DOMAIN = 'SMAUG'
 TOKEN_TYPE = 'Bearer'
 
+_logger = logging.getLogger(__name__)
+
 
 class AuthorizationServer(object):
 
@@ -16,27 +21,51 @@ class AuthorizationServer(object):
         self.challenge_url = conf.PDS_CHALLENGE_URL
         self.token_url = conf.PDS_TOKEN_URL
         self.verify_token_url = conf.IAA_VERIFY_URL
+        self.pds_timeout = (conf.AUTH_CONNECT_TIMEOUT, conf.PDS_READ_TIMEOUT)
+        self.iaa_timeout = (conf.AUTH_CONNECT_TIMEOUT, conf.IAA_READ_TIMEOUT)
+        self.local_token_verifier = None
+        if conf.TOKEN_VERIFICATION_MODE == "local":
+            from project.token_verification import LocalTokenVerifier
+            self.local_token_verifier = LocalTokenVerifier(conf.AS_PUBLIC_KEY_LOCATION, conf.AS_PUBLIC_KEY_REFRESH_INTERVAL, conf.TOKEN_VERIFY_EXPIRATION, self.pds_timeout)
 
     def add_did(self, did: str, verkey: str, user: str) -> Response:
         aud = user  # The domain name of the protected resources
         payload = {'action': 'add', 'did': str(did), 'verkey': str(verkey), 'password': 'thepassword', 'metadata': json.dumps({'aud': aud})}
-        return post_request(self.add_did_url, payload)
+        return post_request(self.add_did_url, payload, self.pds_timeout)
 
     def create_challenge_response(self, did):
         payload = {'grant-type': GRANT, 'grant': did}
-        return post_request(self.challenge_url, payload)
+        return post_request(self.challenge_url, payload, self.pds_timeout)
 
     def create_did_token_response(self, did, challenge, proof):
         payload = {'grant-type': GRANT, 'grant': did, 'challenge': challenge, 'proof': proof}
-        return post_request(self.token_url, payload)
+        return post_request(self.token_url, payload, self.pds_timeout)
 
     def revoke_did_token(self, request):
         raise NotImplementedError
 
     def validate_token(self, token):
         headers = {"Authorization": "Bearer " + token, "Content-Type": "application/json", "Accept": "application/json"}
-        return put_request(self.verify_token_url, headers)
+        return put_request(self.verify_token_url, headers, timeout=self.iaa_timeout)
+
 
+    # Verifies the token and returns the (status code, claims) tuple. The status code is 200 if the token is valid, 503 if the token could not be verified, and 403 otherwise (e.g. 401 from the IAA).
+    # Tokens are verified locally against the AS public key if TOKEN_VERIFICATION_MODE is "local", by the IAA otherwise.
+    def verify_and_decode_token(self, token) -> Tuple[int, dict]:
+        if self.local_token_verifier is not None:
+            try:
+                claims = self.local_token_verifier.verify(token)
+            except IOError as e:
+                _logger.error(f"Tokens cannot be verified: {e}")
+                return 503, None
+            return (200, claims) if claims is not None else (403, None)
+        response = self.validate_token(token)
+        if response.status_code == 503:
+            return 503, None
+        if response.status_code != 200:
+            return 403, None
+        decoded_token = self.decode_token(token)
+        return (200, decoded_token[1]) if decoded_token else (403, None)
 
     @staticmethod
     def decode_token(token):
@@ -48,18 +77,97 @@ class AuthorizationServer(object):
         return True, decode
 
 
-def post_request(url, payload):
+# Stops sending requests to a host after a number of consecutive failures, until the reset timeout elapses. A single request is then let through to probe the host again.
+class CircuitBreaker(object):
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._opened_at = time.monotonic()          # Half-open: let this request through, keep failing fast for the others
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive_failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+# HTTP client shared by all the AuthorizationServer instances, keeping alive a pool of connections and a circuit breaker for each of the PDS and IAA hosts.
+class PooledHttpClient(object):
+
+    def __init__(self, pool_size: int, max_retries: int, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.session = requests.Session()
+        # Only failed connection attempts are retried, as the request never reached the server and it is safe to send it again.
+        retries = Retry(total=max_retries, connect=max_retries, read=0, status=0, redirect=0, backoff_factor=0.1)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._circuit_breakers = {}
+        self._lock = threading.Lock()
+
+    def request(self, method: str, url: str, timeout, **kwargs) -> Response:
+        circuit_breaker = self._get_circuit_breaker(url)
+        if not circuit_breaker.allow_request():
+            return _service_unavailable_response()
+        try:
+            response = self.session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            circuit_breaker.record_failure()
+            return _service_unavailable_response()
+        # 500 is used by the PDS for application errors (e.g. wrong proofs), so only gateway errors count as failures.
+        if response.status_code in (502, 503, 504):
+            circuit_breaker.record_failure()
+        else:
+            circuit_breaker.record_success()
+        return response
+
+    def _get_circuit_breaker(self, url: str) -> CircuitBreaker:
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            if host not in self._circuit_breakers:
+                self._circuit_breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._circuit_breakers[host]
+
+
+_http_client: PooledHttpClient = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> PooledHttpClient:
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            from project import app_config as conf
+            _http_client = PooledHttpClient(conf.AUTH_POOL_SIZE, conf.AUTH_MAX_RETRIES, conf.AUTH_CIRCUIT_FAILURE_THRESHOLD, conf.AUTH_CIRCUIT_RESET_TIMEOUT)
+        return _http_client
+
+
+def _service_unavailable_response() -> Response:
     response = requests.Response()
-    try:
-        response = requests.post(url, data=payload)
-    except requests.exceptions.ConnectionError:
-        response.status_code = 503
+    response.status_code = 503
     return response
 
-def put_request(url, headers, payload={}):
-    response = requests.Response()
-    try:
-        response = requests.put(url, headers=headers, data=payload)
-    except requests.exceptions.ConnectionError:
-        response.status_code = 503
-    return response
\ No newline at end of file
+
+def post_request(url, payload, timeout=None):
+    return get_http_client().request("POST", url, timeout, data=payload)
+
+def put_request(url, headers, payload={}, timeout=None):
+    return get_http_client().request("PUT", url, timeout, headers=headers, data=payload)
@@ -16,18 +16,57 @@ class BaseConfig(object):
     ETHEREUM_MARKETPLACE_SC_ADDRESS = os.environ.get("ETH_MARKETPLACE_SC_ADDR", "0xbcaAFEEA5F90d310f7B284c8348412DDc02C267b")
     ETHEREUM_MARKETPLACE_SC_ABI_PATH = os.path.abspath(os.path.join("project", "..", "SMAUGMarketPlaceABI.json"))
     ETHEREUM_MARKETPLACE_OWNER_ADDRESS = os.environ.get("ETH_MARKETPLACE_OWNER_ADDR", "0x471e0575bFC76d7e189ab3354E0ecb70FCbf3E46")
+    ETHEREUM_MARKETPLACE_OWNER_PRIVATE_KEY = os.environ.get("ETHEREUM_MARKETPLACE_OWNER_PRIVATE_KEY")
+    MARKETPLACE_TOKEN_POOL_SIZE = int(os.environ.get("MARKETPLACE_TOKEN_POOL_SIZE", 0))
+    MARKETPLACE_TOKEN_POOL_MAX_REQUESTORS = int(os.environ.get("MARKETPLACE_TOKEN_POOL_MAX_REQUESTORS", 100))
 
     MARKETPLACE_BROKER_URL = os.environ.get("MARKETPLACE_BROKER_URL")
     MARKETPLACE_BROKER_TOPIC = os.environ.get("MARKETPLACE_BROKER_TOPIC", "contract-events")
+    MARKETPLACE_BROKER_GROUP_ID = os.environ.get("MARKETPLACE_BROKER_GROUP_ID", "om-backend")
+    MARKETPLACE_BROKER_MAX_RETRIES = int(os.environ.get("MARKETPLACE_BROKER_MAX_RETRIES", 5))
+    MARKETPLACE_BROKER_RETRY_DELAY = float(os.environ.get("MARKETPLACE_BROKER_RETRY_DELAY", 1))
+    MARKETPLACE_BROKER_RETRY_QUEUE_SIZE = int(os.environ.get("MARKETPLACE_BROKER_RETRY_QUEUE_SIZE", 1000))
+    MARKETPLACE_DEAD_LETTER_DB_PATH = os.environ.get("MARKETPLACE_DEAD_LETTER_DB_PATH", os.path.abspath("marketplace_dead_letters.db"))
 
     PDS_CHALLENGE_URL = urllib.parse.urljoin(PDS_ENDPOINT_URL, "gettoken")
     PDS_TOKEN_URL = urllib.parse.urljoin(PDS_ENDPOINT_URL, "gettoken")
     IAA_VERIFY_URL = urllib.parse.urljoin(IAA_ENDPOINT_URL, "secure/jwt")
 
+    AUTH_CONNECT_TIMEOUT = float(os.environ.get("AUTH_CONNECT_TIMEOUT", 3))
+    PDS_READ_TIMEOUT = float(os.environ.get("PDS_READ_TIMEOUT", 10))
+    IAA_READ_TIMEOUT = float(os.environ.get("IAA_READ_TIMEOUT", 5))
+    AUTH_POOL_SIZE = int(os.environ.get("AUTH_POOL_SIZE", 10))
+    AUTH_MAX_RETRIES = int(os.environ.get("AUTH_MAX_RETRIES", 2))
+    AUTH_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("AUTH_CIRCUIT_FAILURE_THRESHOLD", 5))
+    AUTH_CIRCUIT_RESET_TIMEOUT = float(os.environ.get("AUTH_CIRCUIT_RESET_TIMEOUT", 30))
+
+    TOKEN_VERIFICATION_MODE = os.environ.get("TOKEN_VERIFICATION_MODE", "remote")
+    AS_PUBLIC_KEY_LOCATION = os.environ.get("AS_PUBLIC_KEY_LOCATION", os.path.abspath(os.path.join("..", "om-iaa", "conf", "keys", "as_public_key.pem")))
+    AS_PUBLIC_KEY_REFRESH_INTERVAL = float(os.environ.get("AS_PUBLIC_KEY_REFRESH_INTERVAL", 60))
+    TOKEN_VERIFY_EXPIRATION = os.environ.get("TOKEN_VERIFY_EXPIRATION", "False").lower() in ("true", "1", "yes")
+    TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", 1024))
+    TOKEN_CACHE_TTL = float(os.environ.get("TOKEN_CACHE_TTL", 30))
+    TOKEN_REVOCATION_LIST_SIZE = int(os.environ.get("TOKEN_REVOCATION_LIST_SIZE", 10000))
+
     SR_SCHEMA_NAME = os.environ.get("SR_SCHEMA_NAME", "SMAUG Smart Locker Schema")
+    SR_SCHEMA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "SL_Schema.json"))
+    SR_SCHEMA_REFRESH_INTERVAL = float(os.environ.get("SR_SCHEMA_REFRESH_INTERVAL", 60))
+    SR_READ_TIMEOUT = float(os.environ.get("SR_READ_TIMEOUT", 10))
     TD_PATH = os.environ.get("TD_PATH", os.path.abspath(os.path.join("project", "SMAUG_TD.json")))
+    TD_CACHE_SIZE = int(os.environ.get("TD_CACHE_SIZE", 10000))
+
+    JSON_ENCODER_BACKEND = os.environ.get("JSON_ENCODER_BACKEND", "auto")
+    JSON_COMPACT = os.environ.get("JSON_COMPACT", "True").lower() in ("true", "1", "yes")
+
+    LOCKER_BULK_MAX_RECORDS = int(os.environ.get("LOCKER_BULK_MAX_RECORDS", 10000))
+    LOCKER_BULK_CHUNK_SIZE = int(os.environ.get("LOCKER_BULK_CHUNK_SIZE", 500))
+    LOCKER_SEARCH_MAX_RADIUS = float(os.environ.get("LOCKER_SEARCH_MAX_RADIUS", 50000))
 
     USER_ETHEREUM_ADDRESS = os.environ.get("USER_ETHEREUM_ADDRESS", "0x471e0575bFC76d7e189ab3354E0ecb70FCbf3E46")
+    ETHEREUM_TRANSACTION_GAS = int(os.environ.get("ETHEREUM_TRANSACTION_GAS", 2000000))
+    ETHEREUM_TRANSACTION_GAS_PRICE = int(os.environ.get("ETHEREUM_TRANSACTION_GAS_PRICE", 1))
+    ETHEREUM_RECEIPT_TIMEOUT = float(os.environ.get("ETHEREUM_RECEIPT_TIMEOUT", 120))
+    TRANSACTION_JOBS_KEPT = int(os.environ.get("TRANSACTION_JOBS_KEPT", 1000))
 
     SERVER_NAME =  os.environ.get("SERVER_NAME", None)
     SECRET_KEY = os.environ.get("SECRET_KEY", "BatmanUsesSteroids")
@@ -0,0 +1,44 @@
+from typing import List, Tuple
+from sqlalchemy import func, or_
+
+
+# Returns the (request ID, status, duration, minimum price) tuples of the requests created by the given Ethereum address for the lockers of the given owner.
+# The page is answered from the DB mirror of the marketplace with a single query. The chain is only read for requests ingested before their creator was stored, which are then updated.
+def get_owner_requests(owner_id: str, creator_address: str) -> List[Tuple[int, str, int, int]]:
+    from project.models import db
+    from project.models.smartLocker import SmartLocker
+    from project.models.marketplaceReq import MarketplaceRequest
+
+    rows = db.session.query(MarketplaceRequest.id, MarketplaceRequest.status, MarketplaceRequest.start_time, MarketplaceRequest.end_time, MarketplaceRequest.auction_min_price_per_slot, MarketplaceRequest.creator_address) \
+        .join(SmartLocker, SmartLocker.id == MarketplaceRequest.locker_id) \
+        .filter(SmartLocker.owner_id == owner_id) \
+        .filter(or_(func.lower(MarketplaceRequest.creator_address) == creator_address.lower(), MarketplaceRequest.creator_address.is_(None))) \
+        .order_by(MarketplaceRequest.id) \
+        .all()
+
+    stale_request_ids = [row[0] for row in rows if row[5] is None]
+    creators = _refresh_request_creators(stale_request_ids) if len(stale_request_ids) > 0 else {}
+
+    requests = []
+    for (request_id, status, start_time, end_time, min_price, stored_creator) in rows:
+        request_creator = stored_creator if stored_creator is not None else creators.get(request_id)
+        if request_creator is None or request_creator.lower() != creator_address.lower():
+            continue
+        requests.append((request_id, status, (end_time - start_time) // 60000, min_price))          # Inverse of the duration conversion in MarketplaceRequestListDeserializer
+    return requests
+
+
+def _refresh_request_creators(request_ids: List[int]) -> dict:
+    from project.models import db
+    from project.models.marketplaceReq import MarketplaceRequest
+    from project.web3 import marketplace_sc
+
+    creators = {}
+    for request_id in request_ids:
+        request_details = marketplace_sc.functions.getRequest(request_id).call()
+        if request_details[0] == 0:
+            creators[request_id] = request_details[3]
+    if len(creators) > 0:
+        db.session.bulk_update_mappings(MarketplaceRequest, [{"id": request_id, "creator_address": creator} for (request_id, creator) in creators.items()])
+        db.session.commit()
+    return creators
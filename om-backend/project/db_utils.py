@@ -20,14 +20,11 @@ def _populate_mocked_db_and_pds(db: SQLAlchemy, mocked_data_path: str, auth_serv
     owners_data = mock_data.get("smart_locker_owners")
     lockers_data = mock_data.get("smart_lockers")
     for owner_entry in owners_data:
-        owner_model_entry = _create_owner_entry_from_mock_data_entry(owner_entry)
-        db.session.add(owner_model_entry)
         if auth_server is AuthorizationServer:
             auth_server.add_did(owner_entry.get("did"), owner_entry.get("verkey"))
 
-    for locker_entry in lockers_data:
-        locker_model_entry = _create_locker_entry_from_mock_data_entry(locker_entry)
-        db.session.add(locker_model_entry)
+    db.session.bulk_save_objects([_create_owner_entry_from_mock_data_entry(owner_entry) for owner_entry in owners_data])
+    db.session.bulk_save_objects([_create_locker_entry_from_mock_data_entry(locker_entry) for locker_entry in lockers_data])
     db.session.commit()
 
 
@@ -41,3 +38,42 @@ def _create_locker_entry_from_mock_data_entry(entry):
     locker = SmartLocker(id=entry.get("id"), name=entry.get("name"), description=entry.get("description"), lat=entry.get("lat"), lon=entry.get("lon"), loc_description=entry.get("loc_description"), icon_image=entry.get("icon_image"), lock_mechanism=entry.get("lock_mechanism"), owner_id=entry.get("owner_id"), chain_id=entry.get("chain_id"), marketplace_smart_contract_address=entry.get("marketplace_smart_contract_address"))
     locker.additional_images = "\n".join(entry.get("additional_images")) if entry.get("additional_images") else None
     return locker
+
+
+# Inserts the given rows in the table of the given model, silently skipping the ones whose primary key is already present.
+# The statement is built for the dialect in use, so that duplicates are discarded by the DB in a single round trip. Returns the number of rows actually inserted.
+def insert_ignoring_duplicates(db: SQLAlchemy, model, rows: list) -> int:
+    if len(rows) == 0:
+        return 0
+    table = model.__table__
+    dialect_name = db.engine.dialect.name
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table).on_conflict_do_nothing(index_elements=[column.name for column in table.primary_key])
+    elif dialect_name == "sqlite":
+        statement = table.insert().prefix_with("OR IGNORE")
+    elif dialect_name == "mysql":
+        statement = table.insert().prefix_with("IGNORE")
+    else:
+        return _insert_one_by_one_ignoring_duplicates(db, table, rows)
+    result = db.session.execute(statement, rows)
+    db.session.commit()
+    return result.rowcount
+
+
+def _insert_one_by_one_ignoring_duplicates(db: SQLAlchemy, table, rows: list) -> int:
+    from sqlalchemy.exc import IntegrityError
+    inserted = 0
+    for row in rows:
+        try:
+            db.session.execute(table.insert(), row)
+            db.session.commit()
+            inserted += 1
+        except IntegrityError:
+            db.session.rollback()
+    return inserted
+
+
+# Returns the column values of a (transient) model instance that are not None, so that column defaults are applied on insert.
+def model_to_row(instance) -> dict:
+    return {column.name: getattr(instance, column.name) for column in instance.__table__.columns if getattr(instance, column.name) is not None}
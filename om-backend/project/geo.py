@@ -0,0 +1,81 @@
+import math
+from typing import List, Tuple
+
+EARTH_RADIUS = 6371008.8            # Mean Earth radius, in meters
+GEOHASH_PRECISION = 9               # Cells of about 4.8m x 4.8m
+MAX_COVERING_CELLS = 32
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# (min lat, min lon, max lat, max lon)
+BoundingBox = Tuple[float, float, float, float]
+
+
+def encode_geohash(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    (lat_range, lon_range) = ([-90.0, 90.0], [-180.0, 180.0])
+    geohash = []
+    (bits, bit_count, use_lon) = (0, 0, True)
+    while len(geohash) < precision:
+        (value, value_range) = (lon, lon_range) if use_lon else (lat, lat_range)
+        middle = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            value_range[0] = middle
+        else:
+            value_range[1] = middle
+        use_lon = not use_lon
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(_BASE32[bits])
+            (bits, bit_count) = (0, 0)
+    return "".join(geohash)
+
+
+# Returns the geohash cells (with the same, largest possible, precision) that together cover the given bounding box, using at most `max_cells` cells.
+# Points inside the box have a geohash starting with one of the cells, so they can be found with a range scan on an index over the geohash column.
+def covering_cells(bounding_box: BoundingBox, max_cells: int = MAX_COVERING_CELLS) -> List[str]:
+    (min_lat, min_lon, max_lat, max_lon) = bounding_box
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lon_bits = (5 * precision + 1) // 2
+        lat_bits = 5 * precision // 2
+        (cell_height, cell_width) = (180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits))
+        lat_indices = range(_cell_index(min_lat, -90.0, cell_height, lat_bits), _cell_index(max_lat, -90.0, cell_height, lat_bits) + 1)
+        lon_indices = range(_cell_index(min_lon, -180.0, cell_width, lon_bits), _cell_index(max_lon, -180.0, cell_width, lon_bits) + 1)
+        if len(lat_indices) * len(lon_indices) > max_cells and precision > 1:
+            continue
+        return sorted({encode_geohash(-90.0 + (lat_index + 0.5) * cell_height, -180.0 + (lon_index + 0.5) * cell_width, precision) for lat_index in lat_indices for lon_index in lon_indices})
+
+
+# Returns the bounding boxes containing all the points within `radius` meters from the given point. Two boxes are returned if the circle crosses the antimeridian.
+def bounding_boxes_for_radius(lat: float, lon: float, radius: float) -> List[BoundingBox]:
+    delta_lat = math.degrees(radius / EARTH_RADIUS)
+    (min_lat, max_lat) = (lat - delta_lat, lat + delta_lat)
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return [(max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0)]           # The circle contains a pole
+    delta_lon = math.degrees(math.asin(min(math.sin(radius / EARTH_RADIUS) / math.cos(math.radians(lat)), 1.0)))
+    (min_lon, max_lon) = (lon - delta_lon, lon + delta_lon)
+    if min_lon < -180.0:
+        return [(min_lat, min_lon + 360.0, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon)]
+    if max_lon > 180.0:
+        return [(min_lat, min_lon, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon - 360.0)]
+    return [(min_lat, min_lon, max_lat, max_lon)]
+
+
+# Returns the (height, width) of the given bounding box, in meters. The width is measured on the parallel of the box closest to the equator, where it is the largest.
+def bounding_box_size(bounding_box: BoundingBox) -> Tuple[float, float]:
+    (min_lat, min_lon, max_lat, max_lon) = bounding_box
+    widest_lat = 0.0 if min_lat <= 0.0 <= max_lat else min(abs(min_lat), abs(max_lat))
+    return EARTH_RADIUS * math.radians(max_lat - min_lat), EARTH_RADIUS * math.cos(math.radians(widest_lat)) * math.radians(max_lon - min_lon)
+
+
+# Great-circle distance between two points, in meters.
+def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    (phi1, phi2) = (math.radians(lat1), math.radians(lat2))
+    (delta_phi, delta_lambda) = (math.radians(lat2 - lat1), math.radians(lon2 - lon1))
+    a = math.sin(delta_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(math.sqrt(a), 1.0))
+
+
+def _cell_index(value: float, origin: float, cell_size: float, bits: int) -> int:
+    return min(int((value - origin) / cell_size), (1 << bits) - 1)
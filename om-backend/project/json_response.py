@@ -0,0 +1,46 @@
+import json
+import flask
+
+try:
+    import orjson
+except ImportError:                 # Optional dependency: the standard library encoder is used if not installed
+    orjson = None
+
+
+# Encodes API response bodies, using orjson if installed (and selected), or the standard library encoder otherwise.
+# In compact mode no whitespace is added to the output, otherwise it is indented as done by flask.jsonify in debug mode.
+class JSONResponseEncoder():
+
+    def __init__(self, backend: str = "auto", compact: bool = True, sort_keys: bool = True):
+        if backend not in ("auto", "orjson", "json"):
+            raise ValueError(f"Unknown JSON encoder backend {backend}.")
+        if backend == "orjson" and orjson is None:
+            raise ValueError("The orjson JSON encoder backend is selected, but orjson is not installed.")
+        self.backend = "orjson" if backend != "json" and orjson is not None else "json"
+        self.compact = compact
+        self.sort_keys = sort_keys
+        if self.backend == "orjson":
+            self._orjson_options = (0 if compact else orjson.OPT_INDENT_2) | (orjson.OPT_SORT_KEYS if sort_keys else 0) | orjson.OPT_NON_STR_KEYS
+        else:
+            self._json_encoder = json.JSONEncoder(separators=(",", ":") if compact else (", ", ": "), indent=None if compact else 2, sort_keys=sort_keys, ensure_ascii=False)
+
+    def dumps(self, payload) -> bytes:
+        if self.backend == "orjson":
+            return orjson.dumps(payload, option=self._orjson_options)
+        return self._json_encoder.encode(payload).encode()
+
+    def response(self, payload, status_code: int = 200) -> flask.Response:
+        return flask.Response(self.dumps(payload), status=status_code, mimetype="application/json")
+
+
+encoder = JSONResponseEncoder()
+
+
+def init_app(app: flask.Flask):
+    global encoder
+    encoder = JSONResponseEncoder(app.config.get("JSON_ENCODER_BACKEND", "auto"), app.config.get("JSON_COMPACT", True), app.config.get("JSON_SORT_KEYS", True))
+    app.logger.info(f"API responses encoded with the {encoder.backend} JSON encoder.")
+
+
+def json_response(payload, status_code: int = 200) -> flask.Response:
+    return encoder.response(payload, status_code)
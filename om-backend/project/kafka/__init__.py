@@ -1,12 +1,28 @@
 from requests.api import request
 from project.models.marketplaceReq import MarketplaceRequest
 from flask import Flask
-from kafka import KafkaConsumer
-import json, logging
+from kafka import KafkaConsumer, TopicPartition
+from kafka.structs import OffsetAndMetadata
+from kafka.errors import KafkaError
+from project.kafka.dead_letters import DeadLetterStore
+import json, logging, heapq, itertools, time
 
 # From https://stackoverflow.com/a/53294319/4048201
 
 _logger: logging.Logger
+_dead_letters = None
+_retry_queue = []                               # Heap of (due time, sequence number, message value, attempts, (partition, offset)) for the messages to handle again
+_retry_sequence = itertools.count()
+_consumed_offsets = {}                          # Partition -> offset following the last message polled
+_pending_offsets = {}                           # Partition -> offsets of the messages waiting in the retry queue
+_committed_offsets = {}                         # Partition -> last offset committed
+_consumer_status = {
+    "processed": 0,
+    "failed_attempts": 0,
+    "retried": 0,
+    "dead_lettered": 0,
+    "lag": {}
+}
 
 def init_app(app: Flask):
     global _logger
@@ -19,24 +35,117 @@ def init_app(app: Flask):
     if len(server_urls) == 0:
         _logger.debug("No Kafka URL passed. Kafka consumer not started.")
         return
+
+    global _dead_letters
+    _dead_letters = DeadLetterStore(app.config.get("MARKETPLACE_DEAD_LETTER_DB_PATH"))
     
     topic_name = app.config.get("MARKETPLACE_BROKER_TOPIC")
-    consumer = KafkaConsumer(topic_name, bootstrap_servers=server_urls)
+    # Offsets are committed only once messages are handled or dead-lettered, so that messages waiting to be retried are consumed again after a restart.
+    consumer = KafkaConsumer(topic_name, bootstrap_servers=server_urls, group_id=app.config.get("MARKETPLACE_BROKER_GROUP_ID"), enable_auto_commit=False)
     
     _logger.info(f"Kafka consumer started for {topic_name} on {server_urls[0]}")
 
     t1 = threading.Thread(target=_poll_kafka_broker, args=[app, consumer], daemon=True)
     t1.start()
 
+# Returns the counters of the consumer, along with the lag for each assigned partition, as of the last poll.
+def get_consumer_status() -> dict:
+    status = dict(_consumer_status)
+    status["running"] = _dead_letters is not None
+    status["retry_queue_size"] = len(_retry_queue)
+    status["dead_letters_stored"] = _dead_letters.count() if _dead_letters is not None else 0
+    return status
+
 def _poll_kafka_broker(app: Flask, consumer: KafkaConsumer):
-    consumer.poll(timeout_ms=1000)
-    for msg in consumer:
-        _message_handler(msg, app)
+    while True:
+        for partition_messages in consumer.poll(timeout_ms=1000).values():
+            for msg in partition_messages:
+                _message_handler(msg, app)
+        _retry_due_messages(app)
+        _commit_offsets(consumer)
+        _update_consumer_lag(consumer)
+
+# Commits, for each partition, the offset of the oldest message still waiting to be retried, or the offset following the last message polled if none is.
+def _commit_offsets(consumer: KafkaConsumer):
+    offsets = {}
+    for partition in consumer.assignment():
+        if partition not in _consumed_offsets:
+            continue
+        pending_offsets = _pending_offsets.get(partition)
+        offset = min(pending_offsets) if pending_offsets else _consumed_offsets[partition]
+        if _committed_offsets.get(partition) != offset:
+            offsets[partition] = OffsetAndMetadata(offset, None)
+    if len(offsets) == 0:
+        return
+    try:
+        consumer.commit(offsets)
+        _committed_offsets.update({partition: offset_and_metadata.offset for (partition, offset_and_metadata) in offsets.items()})
+    except KafkaError:
+        _logger.exception("Offsets could not be committed to the broker.")
+
+def _update_consumer_lag(consumer: KafkaConsumer):
+    lag = {}
+    for partition in consumer.assignment():
+        highwater = consumer.highwater(partition)
+        if highwater is not None:
+            lag[f"{partition.topic}-{partition.partition}"] = highwater - consumer.position(partition)
+    _consumer_status["lag"] = lag
 
 def _message_handler(data, app):
-    serialised_data = json.loads(data.value)
-    event_name = serialised_data["details"]["name"]
+    partition = TopicPartition(data.topic, data.partition)
+    _consumed_offsets[partition] = data.offset + 1
+    _process_message(app, data.value, 1, (partition, data.offset))
+
+# Handles a message without ever letting an exception reach the polling loop. Messages that cannot be parsed are dead-lettered straight away, the others are retried with exponential backoff.
+# The position is the (partition, offset) pair of the message, which stays uncommitted while the message is waiting to be retried.
+def _process_message(app: Flask, message: bytes, attempt: int, position: tuple):
+    try:
+        serialised_data = json.loads(message)
+        event_name = serialised_data["details"]["name"]
+    except (ValueError, KeyError, TypeError) as e:
+        _logger.error(f"Malformed message received from the broker: {e}")
+        _dead_letter(message, e, attempt)
+        _release_offset(position)
+        return
+
+    try:
+        _handle_event(app, serialised_data, event_name)
+        _consumer_status["processed"] += 1
+        _release_offset(position)
+    except Exception as e:
+        _consumer_status["failed_attempts"] += 1
+        _logger.exception(f"Attempt {attempt} to handle event {event_name} failed.")
+        _schedule_retry(app, message, attempt, e, position)
+
+def _schedule_retry(app: Flask, message: bytes, attempt: int, error: Exception, position: tuple):
+    if attempt >= app.config.get("MARKETPLACE_BROKER_MAX_RETRIES") or len(_retry_queue) >= app.config.get("MARKETPLACE_BROKER_RETRY_QUEUE_SIZE"):
+        _dead_letter(message, error, attempt)
+        _release_offset(position)
+        return
+    delay = app.config.get("MARKETPLACE_BROKER_RETRY_DELAY") * 2 ** (attempt - 1)
+    (partition, offset) = position
+    _pending_offsets.setdefault(partition, set()).add(offset)
+    heapq.heappush(_retry_queue, (time.monotonic() + delay, next(_retry_sequence), message, attempt + 1, position))
+    _logger.info(f"Message scheduled to be handled again in {delay} seconds.")
 
+def _retry_due_messages(app: Flask):
+    while len(_retry_queue) > 0 and _retry_queue[0][0] <= time.monotonic():
+        (_, _, message, attempt, position) = heapq.heappop(_retry_queue)
+        _consumer_status["retried"] += 1
+        _process_message(app, message, attempt, position)
+
+def _release_offset(position: tuple):
+    (partition, offset) = position
+    _pending_offsets.get(partition, set()).discard(offset)
+
+def _dead_letter(message: bytes, error: Exception, attempts: int):
+    _consumer_status["dead_lettered"] += 1
+    try:
+        _dead_letters.add(message, repr(error), attempts)
+    except Exception:
+        _logger.exception("Message could not be saved in the dead letter store.")
+
+def _handle_event(app: Flask, serialised_data: dict, event_name: str):
     _logger.debug(f"Event name: {event_name}")
 
     if event_name == "RequestExtraAdded":
@@ -44,7 +153,8 @@ def _message_handler(data, app):
         request_id = serialised_data["details"]["nonIndexedParameters"][0]["value"]
         _logger.debug(f"Request ID: {request_id}")
         request_details = _fetch_request_details(request_id)
-        _save_request_state(app, request_id, request_details)
+        creator_address = _fetch_request_creator(request_id)
+        _save_request_state(app, request_id, request_details, creator_address)
     elif event_name == "RequestClosed":
         _logger.info(f"Marking request as closed...")
         request_id = serialised_data["details"]["nonIndexedParameters"][0]["value"]
@@ -55,6 +165,7 @@ def _message_handler(data, app):
         request_id = serialised_data["details"]["nonIndexedParameters"][0]["value"]
         _logger.debug(f"Request ID: {request_id}")        
         _update_request_status(app, request_id, "decided")
+        _save_request_bookings(app, request_id, _fetch_accepted_offer_ids(request_id))
     elif event_name == "OfferAdded":
         _logger.info(f"Adding new offer to DB...")
         offer_id = serialised_data["details"]["nonIndexedParameters"][0]["value"]
@@ -76,24 +187,27 @@ def _fetch_request_details(request_id: str):
     _logger.info(f"Locker ID for request {request_id}: {locker_id}.")
     return request_details
 
-def _save_request_state(app: Flask, request_id, request_details):
+def _fetch_request_creator(request_id: str) -> str:
+    from project.web3 import marketplace_sc
+    return marketplace_sc.functions.getRequest(request_id).call()[3]
+
+def _save_request_state(app: Flask, request_id, request_details, creator_address=None):
     from project.models import db
     from project.models.marketplaceReq import MarketplaceRequestListDeserializer
+    from project.db_utils import insert_ignoring_duplicates, model_to_row
 
     marketplace_request = MarketplaceRequestListDeserializer().decode(request_details)
+    marketplace_request.id = request_id
+    marketplace_request.creator_address = creator_address
 
+    # Redelivered events are discarded by the DB itself, without a previous lookup.
     with app.app_context():
-        existing_marketplace_request = MarketplaceRequest.query.get(request_id)
+        inserted = insert_ignoring_duplicates(db, MarketplaceRequest, [model_to_row(marketplace_request)])
 
-    if existing_marketplace_request is not None:
-        _logger.error("Trying to save a request that was already present in the DB.")
-        return
-    
-    marketplace_request.id = request_id
-    with app.app_context():
-        db.session.add(marketplace_request)
-        db.session.commit()
-        _logger.info(f"Request {marketplace_request.id} added to db.")
+    if inserted == 0:
+        _logger.warning(f"Request {request_id} was already present in the DB.")
+    else:
+        _logger.info(f"Request {request_id} added to db.")
 
 def _update_request_status(app: Flask, request_id, request_status):
     from project.models import db
@@ -109,22 +223,49 @@ def _update_request_status(app: Flask, request_id, request_status):
             else:
                 _logger.warning(f"State for request with ID {request_id} not changed.")
 
+def _fetch_accepted_offer_ids(request_id: str) -> list:
+    from project.web3 import marketplace_sc
+    return marketplace_sc.functions.getRequestDecision(request_id).call()[1]
+
+# Stores the occupancy intervals of the locker for the accepted offers. Offers without extra use the whole request interval.
+def _save_request_bookings(app: Flask, request_id, accepted_offer_ids: list):
+    from project.models import db
+    from project.models.marketplaceOff import MarketplaceOffer
+    from project.models.lockerBooking import LockerBooking
+    from project.db_utils import insert_ignoring_duplicates
+
+    if len(accepted_offer_ids) == 0:
+        return
+    with app.app_context():
+        rows = db.session.query(MarketplaceOffer.id, MarketplaceOffer.start_time, MarketplaceOffer.end_time, MarketplaceRequest.locker_id, MarketplaceRequest.start_time, MarketplaceRequest.end_time) \
+            .join(MarketplaceRequest, MarketplaceRequest.id == MarketplaceOffer.request_id) \
+            .filter(MarketplaceOffer.request_id == request_id, MarketplaceOffer.id.in_(accepted_offer_ids)).all()
+        bookings = [{
+            "offer_id": offer_id,
+            "request_id": request_id,
+            "locker_id": locker_id,
+            "start_time": offer_start if offer_start is not None else request_start,
+            "end_time": offer_end if offer_end is not None else request_end
+        } for (offer_id, offer_start, offer_end, locker_id, request_start, request_end) in rows]
+        inserted = insert_ignoring_duplicates(db, LockerBooking, bookings)
+
+    if len(rows) < len(accepted_offer_ids):
+        _logger.warning(f"Only {len(rows)} of the {len(accepted_offer_ids)} accepted offers for request {request_id} are present in the DB.")
+    _logger.info(f"{inserted} bookings added to db for request {request_id}.")
+
 def _save_new_offer(app:Flask, offer_id, request_id):
     from project.models import db
     from project.models.marketplaceOff import MarketplaceOffer
+    from project.db_utils import insert_ignoring_duplicates, model_to_row
 
     marketplace_offer = MarketplaceOffer.new_offer(offer_id, request_id)
 
     with app.app_context():
-        existing_marketplace_offer = MarketplaceOffer.query.get(offer_id)
+        inserted = insert_ignoring_duplicates(db, MarketplaceOffer, [model_to_row(marketplace_offer)])
 
-    if existing_marketplace_offer is not None:
-        _logger.error("Trying to save a offer that was already present in the DB.")
-        return
-    
-    with app.app_context():
-        db.session.add(marketplace_offer)
-        db.session.commit()
+    if inserted == 0:
+        _logger.warning(f"Offer {offer_id} was already present in the DB.")
+    else:
         _logger.info(f"Offer {offer_id} added to db.")
 
 
@@ -137,19 +278,16 @@ def _fetch_offer_details(offer_id: str):
 def _save_offer_state(app: Flask, offer_id, offer_status):
     from project.models import db
     from project.models.marketplaceOff import MarketplaceOfferListDeserializer, MarketplaceOffer
+    from project.db_utils import model_to_row
 
     marketplace_offer_with_extra = MarketplaceOfferListDeserializer().decode(offer_status)
 
+    # A single UPDATE both checks that the offer exists and stores its extra. Applying the same extra twice leaves the row unchanged.
     with app.app_context():
-        existing_marketplace_offer = MarketplaceOffer.query.get(offer_id)
+        result = db.session.execute(MarketplaceOffer.__table__.update().where(MarketplaceOffer.id == offer_id).values(**model_to_row(marketplace_offer_with_extra)))
+        db.session.commit()
 
-    if existing_marketplace_offer is None:
+    if result.rowcount == 0:
         _logger.error("Trying to save extra for an offer that is not present in the DB.")
-        return
-    
-    # From https://www.michaelcho.me/article/sqlalchemy-commit-flush-expire-refresh-merge-whats-the-difference
-    with app.app_context():
-        marketplace_offer_with_extra.id = offer_id
-        db.session.merge(marketplace_offer_with_extra)
-        db.session.commit()
-        _logger.info(f"Offer {offer_id} extra added to db.")
\ No newline at end of file
+    else:
+        _logger.info(f"Offer {offer_id} extra added to db.")
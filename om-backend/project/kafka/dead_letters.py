@@ -0,0 +1,21 @@
+import sqlite3, threading, time
+
+
+# Local SQLite store for the broker messages that could not be handled, so that they can be inspected and replayed without re-consuming the whole topic.
+class DeadLetterStore():
+
+    def __init__(self, db_path: str):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS dead_letter (id INTEGER PRIMARY KEY AUTOINCREMENT, message BLOB NOT NULL, error TEXT, attempts INTEGER NOT NULL, failed_at REAL NOT NULL)")
+            self._connection.commit()
+
+    def add(self, message: bytes, error: str, attempts: int):
+        with self._lock:
+            self._connection.execute("INSERT INTO dead_letter (message, error, attempts, failed_at) VALUES (?, ?, ?, ?)", (message, error, attempts, time.time()))
+            self._connection.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0]
@@ -1,4 +1,4 @@
-import yaml, logging
+import os, yaml, logging
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -11,8 +11,10 @@ from distutils.util import strtobool
 
 _auth: AuthorizationServer
 db = SQLAlchemy()
+migrate = Migrate(directory=os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "migrations")))
 login = LoginManager()
 _logger: logging.Logger
+INITIAL_REVISION = "095c94b5e14d"                  # Schema created by db.create_all() before the migrations were introduced
 
 
 def init_app(app: Flask):
@@ -20,6 +22,7 @@ def init_app(app: Flask):
     from project.models.smartLockerOwner import SmartLockerOwner
     from project.models.marketplaceReq import MarketplaceRequest
     from project.models.marketplaceOff import MarketplaceOffer
+    from project.models.lockerBooking import LockerBooking
 
     global _auth
     _auth = AuthorizationServer()
@@ -35,9 +38,9 @@ def init_app(app: Flask):
     global _logger
     _logger = app.logger
 
-    Migrate().init_app(app, db)
+    migrate.init_app(app, db)
     with app.app_context():
-        db.create_all()
+        _upgrade_db()
         
     mock_data_file_path = app.config.get("MOCK_DATA_FILE_PATH")
     if mock_data_file_path is not None:
@@ -51,3 +54,14 @@ def init_app(app: Flask):
             _logger.info("Mocked wallet created.")
 
 
+# Brings the DB schema to the latest migration (see the migrations folder).
+# DBs created before the migrations were introduced, with db.create_all(), are stamped with the initial schema first.
+def _upgrade_db():
+    from alembic import command
+    config = migrate.get_config()
+    config.attributes["configure_logger"] = False
+    table_names = db.inspect(db.engine).get_table_names()
+    if "alembic_version" not in table_names and "smart_locker" in table_names:
+        command.stamp(config, INITIAL_REVISION)
+        _logger.info("Existing DB stamped with the initial schema revision.")
+    command.upgrade(config, "head")
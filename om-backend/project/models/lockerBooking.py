@@ -0,0 +1,22 @@
+from project.models import db
+
+
+# Interval during which a smart locker is occupied, i.e., the rent time of an offer accepted by the request decision.
+# Kept in a separate table, indexed by locker and start time, so that free lockers can be found with an anti-join instead of walking requests and offers.
+class LockerBooking(db.Model):
+    __tablename__="locker_booking"
+    __table_args__ = (db.Index("ix_locker_booking_locker_id_start_time", "locker_id", "start_time", "end_time"),)
+
+    offer_id = db.Column(db.BIGINT, db.ForeignKey("marketplace_offer.id"), nullable=False, primary_key=True)
+    request_id = db.Column(db.BIGINT, db.ForeignKey("marketplace_request.id"), nullable=False)
+    locker_id = db.Column(db.BIGINT, db.ForeignKey("smart_locker.id"), nullable=False)
+    start_time = db.Column(db.BIGINT, nullable=False)
+    end_time = db.Column(db.BIGINT, nullable=False)
+
+    def __repr__(self):
+        return f"Booking of locker {self.locker_id} for offer {self.offer_id}: {self.start_time} - {self.end_time}"
+
+    # Filter condition matching the bookings of the given locker column overlapping the [start_time, end_time) interval.
+    @classmethod
+    def overlapping(cls, locker_id_column, start_time: int, end_time: int):
+        return db.and_(cls.locker_id == locker_id_column, cls.start_time < end_time, cls.end_time > start_time)
@@ -4,6 +4,7 @@ from project.models import db
 
 class MarketplaceOffer(db.Model):
     __tablename__="marketplace_offer"
+    __table_args__ = (db.Index("ix_marketplace_offer_request_id_offer_type", "request_id", "offer_type", "id"),)
 
     id = db.Column(db.BIGINT, nullable=False, primary_key=True)
     start_time = db.Column(db.BIGINT)
@@ -30,7 +31,7 @@ class MarketplaceOfferListDeserializer():
     def decode(self, marketplace_offer_details) -> MarketplaceOffer:
         properties = {
             "start_time": marketplace_offer_details[1],
-            "end_time": marketplace_offer_details[2] + marketplace_offer_details[1]*60000,
+            "end_time": marketplace_offer_details[1] + marketplace_offer_details[2]*60000,
             "offer_type": marketplace_offer_details[3],
             "price_offered": marketplace_offer_details[4],
             "offer_creator_encryption_key": hex(marketplace_offer_details[5]),
@@ -4,6 +4,7 @@ from project.models import db
 
 class MarketplaceRequest(db.Model):
     __tablename__="marketplace_request"
+    __table_args__ = (db.Index("ix_marketplace_request_locker_id_status", "locker_id", "status", "id"),)
 
     id = db.Column(db.BIGINT, nullable=False, primary_key=True)
     start_time = db.Column(db.BIGINT, nullable=False)
@@ -12,6 +13,7 @@ class MarketplaceRequest(db.Model):
     instant_rent_rules = db.Column(db.String)
     locker_id = db.Column(db.BIGINT, db.ForeignKey("smart_locker.id"), nullable=False)
     status = db.Column(db.String, default="open")
+    creator_address = db.Column(db.String)                  # Ethereum address of the request maker, stored at ingest time
 
     def __repr__(self):
         return f"Marketplace request {self.id} for locker {self.locker_id}: {self.status}"
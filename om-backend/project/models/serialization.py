@@ -0,0 +1,61 @@
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+# One value written by a public field: the value built from `columns` is written under `key`, in the `section` sub-object of the result (or at the top level if None).
+# If `builder` is None there must be a single column, whose value is written as is. None values are never written.
+class FieldEntry(NamedTuple):
+    section: Optional[str]
+    key: str
+    columns: Tuple[str, ...]
+    builder: Optional[Callable] = None
+
+
+# Declarative description of how a public field is serialised, as the list of the values it writes.
+FieldSpec = List[FieldEntry]
+
+
+# Serialises model instances from plain result rows, which must contain the columns in `columns`, in the same order.
+# The column indices and value readers of the selected fields are computed once, when the serializer is created, so serialising a row is a single pass over them.
+class RowSerializer():
+    def __init__(self, model, spec: Dict[str, FieldSpec], fields: Iterable[str] = None, sections: Iterable[str] = ()):
+        self.fields = [field for field in spec if fields is None or field in fields]
+        self.column_names = []
+        self._sections = tuple(sections)                # Sections always present in the result, even if empty
+        self._writers = []
+        for field in self.fields:
+            for entry in spec[field]:
+                indices = [self._add_column(column) for column in entry.columns]
+                if entry.builder is None:
+                    read = itemgetter(indices[0])
+                else:
+                    read = _compile_reader(entry.builder, indices)
+                self._writers.append((entry.section, entry.key, read))
+        self.columns = [getattr(model, column) for column in self.column_names]
+
+    def serialize(self, row) -> {}:
+        result = {section: {} for section in self._sections}
+        for (section, key, read) in self._writers:
+            value = read(row)
+            if value is None:
+                continue
+            if section is None:
+                result[key] = value
+            else:
+                target = result.get(section)
+                if target is None:
+                    target = result[section] = {}
+                target[key] = value
+        return result
+
+    def _add_column(self, column: str) -> int:
+        if column not in self.column_names:
+            self.column_names.append(column)
+        return self.column_names.index(column)
+
+
+def _compile_reader(builder: Callable, indices: List[int]) -> Callable:
+    get_values = itemgetter(*indices)
+    if len(indices) == 1:
+        return lambda row: builder(get_values(row))
+    return lambda row: builder(*get_values(row))
@@ -1,5 +1,12 @@
 import json.decoder
 from project.models import db
+from project.models.serialization import FieldEntry, RowSerializer
+from project.geo import encode_geohash
+
+
+def _locker_geohash(context) -> str:
+    parameters = context.get_current_parameters()
+    return encode_geohash(parameters["lat"], parameters["lon"])
 
 
 class SmartLocker(db.Model):
@@ -18,11 +25,12 @@ class SmartLocker(db.Model):
     description = db.Column(db.Text)
     lat = db.Column(db.Float, nullable=False)
     lon = db.Column(db.Float, nullable=False)
+    geohash = db.Column(db.String, default=_locker_geohash, index=True)     # Spatial index for the location, computed from lat and lon at insert time and when they are updated
     loc_description = db.Column(db.Text)
     icon_image = db.Column(db.Text, nullable=False)
     additional_images = db.Column(db.Text)                     # Serialised JSON Array
     lock_mechanism = db.Column(db.Text, nullable=False)
-    owner_id = db.Column(db.String, db.ForeignKey("smart_locker_owner.id"), nullable=False)
+    owner_id = db.Column(db.String, db.ForeignKey("smart_locker_owner.id"), nullable=False, index=True)
 
     chain_id = db.Column(db.Text)
     marketplace_smart_contract_address = db.Column(db.Text)
@@ -31,24 +39,50 @@ class SmartLocker(db.Model):
         return '<Smart locker %r>' % self.id
 
 
+@db.event.listens_for(SmartLocker, "before_update")
+def _update_locker_geohash(mapper, connection, smart_locker: SmartLocker):
+    state = db.inspect(smart_locker)
+    if state.attrs.lat.history.has_changes() or state.attrs.lon.history.has_changes():
+        smart_locker.geohash = encode_geohash(smart_locker.lat, smart_locker.lon)
+
+
+def _serialize_location(lat, lon, loc_description) -> {}:
+    location = {"lat": lat, "lon": lon}
+    if loc_description:
+        location["additional_info"] = loc_description
+    return location
+
+
+def _serialize_additional_images(additional_images: str) -> []:
+    return additional_images.split("\n") if additional_images is not None else None    # Definitely not safe. Used for testing, for now.
+
+
+# How each public field of a smart locker is serialised (see project.models.serialization.FieldSpec).
+SMART_LOCKER_FIELDS = {
+    "id": [FieldEntry("locker", "id", ("id",))],
+    "name": [FieldEntry("locker", "name", ("name",))],
+    "description": [FieldEntry("locker", "description", ("description",))],
+    "location": [FieldEntry("locker", "location", ("lat", "lon", "loc_description"), _serialize_location)],
+    "icon_image": [FieldEntry("locker", "icon_image", ("icon_image",))],
+    "additional_images": [FieldEntry("locker", "additional_images", ("additional_images",), _serialize_additional_images)],
+    "lock_mechanism": [FieldEntry("locker", "lock_mechanism", ("lock_mechanism",))],
+    "owner_id": [FieldEntry("locker", "owner_id", ("owner_id",))],
+    "marketplace": [FieldEntry("marketplace", "chain_id", ("chain_id",)), FieldEntry("marketplace", "marketplace_smart_contract_address", ("marketplace_smart_contract_address",))]
+}
+
+
+# Serialises smart lockers from plain result rows. Only the columns needed for the requested fields (all of them if not specified) are selected.
+class SmartLockerRowSerializer(RowSerializer):
+    def __init__(self, fields=None):
+        super().__init__(SmartLocker, SMART_LOCKER_FIELDS, fields, sections=("locker",))
+
+
 class SmartLockerJSONSerializer(json.encoder.JSONEncoder):
+    _row_serializer = SmartLockerRowSerializer()
+
     def default(self, smart_locker: SmartLocker) -> {}:
-        # Get the locker properties from the SQLAlchemy model, filter only the needed properties, and remove any None values.
-        locker_properties = {property: smart_locker.__dict__[property] for property in {"name", "id", "description", "lat", "lon", "loc_description", "icon_image", "additional_images", "lock_mechanism", "owner_id"} if smart_locker.__dict__[property] is not None}
-        marketplace_properties = {property: smart_locker.__dict__[property] for property in {"chain_id", "marketplace_smart_contract_address"} if smart_locker.__dict__[property] is not None}
-        if locker_properties.get("additional_images") is not None:
-            encoded_additional_images = locker_properties.pop("additional_images")
-            locker_properties["additional_images"] = encoded_additional_images.split("\n")    # Definitely not safe. Used for testing, for now.
-        lat = locker_properties.pop("lat")
-        lon = locker_properties.pop("lon")
-        locker_properties["location"] = {"lat": lat, "lon": lon}
-        if (locker_properties.get("loc_description")):
-            loc_description = locker_properties.pop("loc_description")
-            locker_properties["location"]["additional_info"] = loc_description
-        result = {"locker": locker_properties}
-        if len(marketplace_properties) > 0:
-            result["marketplace"] = marketplace_properties
-        return result
+        row = [getattr(smart_locker, column) for column in self._row_serializer.column_names]
+        return self._row_serializer.serialize(row)
 
 
 class SmartLockerJSONDeserializer(json.decoder.JSONDecoder):
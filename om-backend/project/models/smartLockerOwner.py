@@ -1,5 +1,6 @@
 import uuid, json.encoder
 from project.models import db, smartLocker, login
+from project.models.serialization import FieldEntry, RowSerializer
 from flask_login import UserMixin
 from flask_serialize import FlaskSerializeMixin
 
@@ -55,9 +56,28 @@ def load_user(id):
     return SmartLockerOwner.query.get(id)
 
 
+# How each public field of a smart locker owner is serialised (see project.models.serialization.FieldSpec).
+# `locker_ids` is not a column, and it is read with a separate query on the smart locker IDs only.
+SMART_LOCKER_OWNER_COLUMN_FIELDS = {field: [FieldEntry(None, field, (field,))] for field in ("name", "id", "description", "address", "url", "logo", "phone")}
+SMART_LOCKER_OWNER_FIELDS = tuple(SMART_LOCKER_OWNER_COLUMN_FIELDS) + ("locker_ids",)
+
+
+# Serialises smart locker owners from plain result rows. Only the columns needed for the requested fields (all of them if not specified) are selected.
+class SmartLockerOwnerRowSerializer(RowSerializer):
+    def __init__(self, fields=None):
+        super().__init__(SmartLockerOwner, SMART_LOCKER_OWNER_COLUMN_FIELDS, fields)
+        self.include_locker_ids = fields is None or "locker_ids" in fields
+
+    def serialize(self, row, locker_ids=None) -> {}:
+        locker_owner_properties = super().serialize(row)
+        if self.include_locker_ids:
+            locker_owner_properties["locker_ids"] = locker_ids if locker_ids is not None else []
+        return locker_owner_properties
+
+
 class SmartLockerOwnerJSONSerializer(json.encoder.JSONEncoder):
+    _row_serializer = SmartLockerOwnerRowSerializer()
+
     def default(self, owner: SmartLockerOwner) -> {}:
-        # Get the locker owner properties from the SQLAlchemy model, filter only the needed properties, and remove any None values.
-        locker_owner_properties = {property: owner.__dict__[property] for property in {"name", "id", "description", "address", "url", "logo", "phone"} if owner.__dict__[property] is not None}
-        locker_owner_properties["locker_ids"] = [locker.id for locker in owner.smart_lockers]
-        return locker_owner_properties
\ No newline at end of file
+        row = [getattr(owner, column) for column in self._row_serializer.column_names]
+        return self._row_serializer.serialize(row, [locker.id for locker in owner.smart_lockers])
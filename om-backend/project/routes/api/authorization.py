@@ -1,13 +1,17 @@
 import json
-from flask import request, jsonify
+from flask import request
 from functools import wraps
 from werkzeug.http import HTTP_STATUS_CODES
 from project.routes.api import blueprint
 from project.routes.api.errors import bad_request, error_response
+from project import app_config
+from project.json_response import json_response
 from project.authorization_server import AuthorizationServer
+from project.token_verification import TokenValidationCache
 
 
 auth = AuthorizationServer()
+token_cache = TokenValidationCache(app_config.TOKEN_CACHE_SIZE, app_config.TOKEN_CACHE_TTL, app_config.TOKEN_REVOCATION_LIST_SIZE)
 
 
 # ToDo Move this decorator somewhere else if needed
@@ -16,15 +20,20 @@ def verify_token(f):
     def wrap(*args, **kwargs):
         if not request.headers.get('authorization'):
             return bad_request('must include the token')
-        response = auth.validate_token(request.headers['authorization'])
-        if response.status_code == 503:
-            return error_response(503, 'The server cannot handle the request')
-        if response.status_code == 403:
-            return error_response(403, 'Token validation failed')
-        owner_id = auth.decode_token(request.headers['authorization'])
-        if not owner_id or owner_id[1]['aud'] is None:
+        token = request.headers['authorization']
+        claims = token_cache.get(token)
+        if claims is None:
+            if token_cache.is_revoked(token):
+                return error_response(403, 'Token validation failed')
+            status_code, claims = auth.verify_and_decode_token(token)
+            if status_code == 503:
+                return error_response(503, 'The server cannot handle the request')
+            if status_code == 403:
+                return error_response(403, 'Token validation failed')
+            token_cache.put(token, claims)
+        if claims.get('aud') is None:
             return error_response(403, 'Token decode failed')
-        return f(owner_id[1]['aud'], *args, **kwargs)
+        return f(claims['aud'], *args, **kwargs)
     return wrap
 
 
@@ -133,14 +142,25 @@ def remove_user(name:str):
     db.session.delete(user)
     db.session.commit()
     message = name + ' removed'
-    response = jsonify({'message': message})
+    response = json_response({'message': message})
     response.status_code = 201
     return response
 
 
+# Revokes the (valid) token in the Authorization header for this backend, so that it is not accepted anymore even if still cached or valid for the IAA.
+# The revocation lasts until the token expires, or forever if its expiration is not checked.
 @blueprint.route('/revoke_token', methods=['POST'])
-def revoke_token():
-    return auth.revoke_did_token(request)
+@verify_token
+def revoke_token(owner_id):
+    token = request.headers['authorization']
+    decoded_token = auth.decode_token(token)
+    if not decoded_token:
+        return bad_request('Token decode failed')
+    expires_at = decoded_token[1].get('exp')
+    if not app_config.TOKEN_VERIFY_EXPIRATION or app_config.TOKEN_VERIFICATION_MODE != "local" or not isinstance(expires_at, (int, float)):
+        expires_at = None
+    token_cache.revoke(token, expires_at)
+    return good_response(200, 'Token revoked')
 
 
 # ToDo Remove once the decorator is used in another route
@@ -154,9 +174,7 @@ def good_response(status_code, message=None):
     payload = {'message': HTTP_STATUS_CODES.get(status_code, 'Unknown error')}
     if message:
         payload['message'] = message
-    response = jsonify(payload)
-    response.status_code = status_code
-    return response
+    return json_response(payload, status_code)
 
 
 
@@ -1,4 +1,4 @@
-from flask import jsonify
+from project.json_response import json_response
 from werkzeug.http import HTTP_STATUS_CODES
 
 
@@ -6,9 +6,7 @@ def error_response(status_code, message=None):
     payload = {'error': HTTP_STATUS_CODES.get(status_code, 'Unknown error')}
     if message:
         payload['message'] = message
-    response = jsonify(payload)
-    response.status_code = status_code
-    return response
+    return json_response(payload, status_code)
 
 
 def bad_request(message):
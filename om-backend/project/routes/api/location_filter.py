@@ -0,0 +1,72 @@
+import flask
+from typing import List, Tuple
+from project import geo
+
+
+# Location filter for smart locker queries: either a circle (`near` and `radius`) or a bounding box (`bbox`).
+# The query is restricted to the geohash cells covering the area, with range scans on the geohash index, and the candidates are then checked exactly with `matches`.
+class LocationFilter():
+
+    def __init__(self, bounding_boxes: List[geo.BoundingBox], center: Tuple[float, float] = None, radius: float = None):
+        self.bounding_boxes = bounding_boxes
+        self.center = center
+        self.radius = radius
+
+    def apply(self, query):
+        from project.models import db
+        from project.models.smartLocker import SmartLocker
+        conditions = []
+        for bounding_box in self.bounding_boxes:
+            (min_lat, min_lon, max_lat, max_lon) = bounding_box
+            cell_conditions = [db.and_(SmartLocker.geohash >= cell, SmartLocker.geohash < cell + "{") for cell in geo.covering_cells(bounding_box)]     # "{" sorts after any geohash character
+            conditions.append(db.and_(db.or_(*cell_conditions), SmartLocker.lat.between(min_lat, max_lat), SmartLocker.lon.between(min_lon, max_lon)))
+        return query.filter(db.or_(*conditions))
+
+    def distance(self, lat: float, lon: float) -> float:
+        return geo.haversine_distance(self.center[0], self.center[1], lat, lon) if self.center is not None else None
+
+    def matches(self, lat: float, lon: float) -> bool:
+        if self.center is not None:
+            return self.distance(lat, lon) <= self.radius
+        return any(min_lat <= lat <= max_lat and min_lon <= lon <= max_lon for (min_lat, min_lon, max_lat, max_lon) in self.bounding_boxes)
+
+
+# Reads the location filter from the current request: `near=<lat>,<lon>` with `radius=<meters>`, or `bbox=<min lat>,<min lon>,<max lat>,<max lon>`.
+# The bounding box can be at most as high and as wide as the circle with the maximum radius.
+# Returns the (filter, error message) tuple, where the filter is None if no location was specified.
+def get_location_filter_args(max_radius: float) -> Tuple[LocationFilter, str]:
+    near = flask.request.args.get("near")
+    radius = flask.request.args.get("radius")
+    bbox = flask.request.args.get("bbox")
+    if near is not None and bbox is not None:
+        return None, "only one of near and bbox can be specified"
+    if near is not None:
+        coordinates = _parse_coordinates(near, 2)
+        if coordinates is None:
+            return None, "near must be in the format <lat>,<lon>"
+        try:
+            radius = float(radius) if radius is not None else None
+        except ValueError:
+            radius = None
+        if radius is None or radius <= 0 or radius > max_radius:
+            return None, f"radius must be a number of meters between 0 and {max_radius:g}"
+        (lat, lon) = coordinates
+        return LocationFilter(geo.bounding_boxes_for_radius(lat, lon, radius), (lat, lon), radius), None
+    if bbox is not None:
+        coordinates = _parse_coordinates(bbox, 4)
+        if coordinates is None or coordinates[0] > coordinates[2] or coordinates[1] > coordinates[3]:
+            return None, "bbox must be in the format <min lat>,<min lon>,<max lat>,<max lon>"
+        if any(size > 2 * max_radius for size in geo.bounding_box_size(tuple(coordinates))):
+            return None, f"bbox must be at most {2 * max_radius:g} meters high and wide"
+        return LocationFilter([tuple(coordinates)]), None
+    return None, None
+
+
+def _parse_coordinates(value: str, count: int) -> List[float]:
+    try:
+        coordinates = [float(coordinate) for coordinate in value.split(",")]
+    except ValueError:
+        return None
+    if len(coordinates) != count or any(not -90 <= lat <= 90 for lat in coordinates[0::2]) or any(not -180 <= lon <= 180 for lon in coordinates[1::2]):
+        return None
+    return coordinates
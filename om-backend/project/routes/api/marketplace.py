@@ -2,10 +2,9 @@ from project.routes.api import blueprint
 from project import app_config
 from werkzeug.http import HTTP_STATUS_CODES
 from web3 import Web3
-from web3.contract import Contract
-from project.routes.api.errors import error_response
-from typing import Tuple
+from project.routes.api.errors import bad_request, error_response
 import flask
+from project.json_response import json_response
 from project.routes.api.authorization import verify_token
 
 
@@ -13,61 +12,48 @@ from project.routes.api.authorization import verify_token
 # @verify_token
 # def get_marketplace_token(owner_id):
 def get_marketplace_token():
-    from project.web3 import marketplace_sc
-    from flask import request, Response, jsonify
+    from project.web3 import token_signer
+    from flask import request, Response
     eth_address = request.args.get("ethereum_address")
     if eth_address is None:
         return Response(status=422)
     if not Web3.isAddress(eth_address):
         return Response(status=400)
         
-    token = _generate_function_signed_token_with_account(marketplace_sc, "submitAuthorisedRequest", eth_address, app_config.ETHEREUM_MARKETPLACE_OWNER_ADDRESS)
-    response: Response = jsonify(token)
+    token = token_signer.generate_token("submitAuthorisedRequest", eth_address)
+    response: Response = json_response(token)
     response.status_code = 200
     return response
 
-
-def _generate_function_signed_token_with_account(contract: Contract, function_name: str, requestor_account: str, manager_account: str) -> dict:
-    from eth_utils import function_abi_to_4byte_selector
-    from project.web3 import web3_instance
-    import secrets
-    function_abi = contract.get_function_by_name(function_name).abi
-    function_abi_encoded = function_abi_to_4byte_selector(function_abi).hex()
-    random_nonce = "0x" + secrets.token_hex(32)
-    message = random_nonce + function_abi_encoded + requestor_account[2:] + contract.address[2:]
-    digest = web3_instance.solidityKeccak(["string", "bytes", "bytes", "bytes", "bytes"], ["\x19Ethereum Signed Message:\n76", random_nonce, "0x" + function_abi_encoded, requestor_account, contract.address]).hex()
-    signature = web3_instance.eth.sign(manager_account, hexstr=message).hex()
-    signature = _update_signature_against_malleability(signature, web3_instance)
-
-    return {"digest": digest, "encoded": message, "signature": signature, "nonce": random_nonce}
-
-# From https://github.com/OpenZeppelin/openzeppelin-contracts/blob/master/contracts/cryptography/ECDSA.sol#L50 (translated from JS)
-def _update_signature_against_malleability(signature: str, web3: Web3) -> str:
-    v = "0x" + signature[-2:]
-    v_decimal = int(v, 16)
-
-    if v_decimal <= 1:
-        v_decimal += 27
-        v = web3.toHex(v_decimal)
-
-    return signature[:-2] + v[2:]
-
 @blueprint.route("/marketplace/requests/<request_id>/offers", methods=["GET"])
 def get_offers_for_request(request_id):
+    from project.models import db
     from project.models.marketplaceReq import MarketplaceRequest
     from project.models.marketplaceOff import MarketplaceOffer
+    from project.routes.api.pagination import get_keyset_pagination_args, paginate_by_id
     from distutils import util
 
-    request = MarketplaceRequest.query.get(request_id)
-    if request is None:
+    (after, limit, error_message) = get_keyset_pagination_args()
+    if error_message is not None:
+        return bad_request(error_message)
+
+    request_exists = db.session.query(db.exists().where(MarketplaceRequest.id == request_id)).scalar()
+    if not request_exists:
         return error_response(404)
 
-    def filter_offer(off: Tuple[int, int]) -> bool:
-        return off[1] == 0 if flask.request.args.get("auction_only") is not None and util.strtobool(flask.request.args.get("auction_only")) else True
+    offers_query = MarketplaceOffer.query.with_entities(MarketplaceOffer.id).filter(MarketplaceOffer.request_id == request_id)
+    if flask.request.args.get("auction_only") is not None and util.strtobool(flask.request.args.get("auction_only")):
+        offers_query = offers_query.filter(MarketplaceOffer.offer_type == 0)
+    offer_ids = [offer[0] for offer in paginate_by_id(offers_query, MarketplaceOffer.id, after, limit).all()]
 
-    offer_ids_filtered = filter(filter_offer, [entry for entry in MarketplaceOffer.query.with_entities(MarketplaceOffer.id,MarketplaceOffer.offer_type).filter(MarketplaceOffer.request_id == request_id).all()])
-    offer_ids = [offer[0] for offer in offer_ids_filtered]
+    response: flask.Response = json_response(offer_ids)
+    response.status_code = 200
+    return response
 
-    response: flask.Response = flask.jsonify(offer_ids)
+
+@blueprint.route("/marketplace/consumer/status", methods=["GET"])
+def get_marketplace_consumer_status():
+    from project import kafka
+    response: flask.Response = json_response(kafka.get_consumer_status())
     response.status_code = 200
-    return response
\ No newline at end of file
+    return response
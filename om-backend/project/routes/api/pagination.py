@@ -0,0 +1,42 @@
+import flask
+from typing import Iterable, List, Tuple
+
+MAX_PAGE_SIZE = 1000
+
+
+# Reads the keyset pagination parameters (`after` and `limit`) from the current request. `after` is the last ID returned in the previous page.
+# Returns the (after, limit, error message) tuple, where `after` and `limit` are None if not specified.
+def get_keyset_pagination_args() -> Tuple[int, int, str]:
+    after = flask.request.args.get("after")
+    limit = flask.request.args.get("limit")
+    try:
+        after = int(after) if after is not None else None
+        limit = int(limit) if limit is not None else None
+    except ValueError:
+        return None, None, "after and limit must be integers"
+    if limit is not None and (limit < 1 or limit > MAX_PAGE_SIZE):
+        return None, None, f"limit must be between 1 and {MAX_PAGE_SIZE}"
+    return after, limit, None
+
+
+# Applies the given keyset pagination parameters to a query, ordering the results by the given ID column.
+def paginate_by_id(query, id_column, after: int, limit: int):
+    if after is not None:
+        query = query.filter(id_column > after)
+    query = query.order_by(id_column)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+# Reads the comma-separated list of fields to return (`fields`) from the current request.
+# Returns the (fields, error message) tuple, where `fields` is None if not specified, i.e., all the fields must be returned.
+def get_fields_arg(allowed_fields: Iterable[str]) -> Tuple[List[str], str]:
+    fields = flask.request.args.get("fields")
+    if fields is None:
+        return None, None
+    fields = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown_fields = [field for field in fields if field not in allowed_fields]
+    if len(fields) == 0 or len(unknown_fields) > 0:
+        return None, f"fields must be a comma-separated list of {', '.join(allowed_fields)}"
+    return fields, None
@@ -1,11 +1,18 @@
-from typing import Dict, Tuple
+import itertools
+import json
+from typing import Any, Dict, List, Tuple
 import flask
-from flask import jsonify
+from project.json_response import json_response
+from sqlalchemy.exc import IntegrityError
 from werkzeug.http import HTTP_STATUS_CODES
 from project import app_config
 from project.routes.api import blueprint
-from project.routes.api.errors import error_response
+from project.routes.api.errors import bad_request, error_response
 from project.routes.api.authorization import verify_token
+from project.schema_validation import SchemaValidationClient
+
+
+schema_validator = SchemaValidationClient(app_config.SR_ENDPOINT_URL, app_config.SR_SCHEMA_NAME, app_config.SR_SCHEMA_PATH, app_config.SR_SCHEMA_REFRESH_INTERVAL, (app_config.AUTH_CONNECT_TIMEOUT, app_config.SR_READ_TIMEOUT))
 
 
 @blueprint.route("/lockers", methods=["POST"])
@@ -38,11 +45,230 @@ def register_new_locker(owner_id):
     db.session.commit()
     smart_locker_id = smart_locker.id
     
-    response = flask.jsonify(id=smart_locker_id)
+    response = json_response({"id": smart_locker_id})
+    response.status_code = 200
+    return response
+
+
+# Searches the lockers around a point (`near` and `radius`) or within a bounding box (`bbox`).
+# Lockers around a point are sorted by distance, and each one is returned with its distance in meters. Lockers in a bounding box are sorted by ID.
+@blueprint.route("/lockers", methods=["GET"])
+def search_lockers():
+    from project.models import db
+    from project.models.smartLocker import SmartLocker, SmartLockerRowSerializer, SMART_LOCKER_FIELDS
+    from project.routes.api.location_filter import get_location_filter_args
+    from project.routes.api.pagination import get_fields_arg, MAX_PAGE_SIZE
+
+    (location_filter, error_message) = get_location_filter_args(app_config.LOCKER_SEARCH_MAX_RADIUS)
+    if error_message is None and location_filter is None:
+        error_message = "one of near and bbox must be specified"
+    if error_message is None:
+        (fields, error_message) = get_fields_arg(SMART_LOCKER_FIELDS)
+    if error_message is not None:
+        return bad_request(error_message)
+    try:
+        limit = int(flask.request.args.get("limit", MAX_PAGE_SIZE))
+    except ValueError:
+        limit = 0
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        return bad_request(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    serializer = SmartLockerRowSerializer(fields)
+
+    response: flask.Response = json_response({"lockers": _find_lockers_by_location(serializer, location_filter, limit)})
+    response.status_code = 200
+    return response
+
+
+# Returns the lockers that have no booking overlapping the [from, to) interval, optionally also filtered by location as in `search_lockers`.
+# Without a location, lockers are sorted by ID and paginated with `after` and `limit`.
+@blueprint.route("/lockers/availability", methods=["GET"])
+def get_available_lockers():
+    from project.models import db
+    from project.models.smartLocker import SmartLocker, SmartLockerRowSerializer, SMART_LOCKER_FIELDS
+    from project.models.lockerBooking import LockerBooking
+    from project.routes.api.location_filter import get_location_filter_args
+    from project.routes.api.pagination import get_keyset_pagination_args, get_fields_arg, paginate_by_id, MAX_PAGE_SIZE
+
+    try:
+        (start_time, end_time) = (int(flask.request.args["from"]), int(flask.request.args["to"]))
+    except (KeyError, ValueError):
+        return bad_request("from and to must be specified as integer timestamps")
+    if start_time >= end_time:
+        return bad_request("from must be before to")
+    (after, limit, error_message) = get_keyset_pagination_args()
+    if error_message is None:
+        (location_filter, error_message) = get_location_filter_args(app_config.LOCKER_SEARCH_MAX_RADIUS)
+    if error_message is None:
+        (fields, error_message) = get_fields_arg(SMART_LOCKER_FIELDS)
+    if error_message is not None:
+        return bad_request(error_message)
+    serializer = SmartLockerRowSerializer(fields)
+    is_free = ~db.exists().where(LockerBooking.overlapping(SmartLocker.id, start_time, end_time))
+
+    if location_filter is not None:
+        lockers = _find_lockers_by_location(serializer, location_filter, limit if limit is not None else MAX_PAGE_SIZE, is_free)
+        result = {"lockers": lockers}
+    else:
+        # The locker ID is always selected (last) to return the pagination cursor, even if not requested.
+        rows = paginate_by_id(db.session.query(*serializer.columns, SmartLocker.id).filter(is_free), SmartLocker.id, after, limit).all()
+        result = {"lockers": [serializer.serialize(row[:-1]) for row in rows]}
+        if limit is not None and len(rows) == limit:
+            result["next"] = rows[-1][-1]
+    response: flask.Response = json_response(result)
     response.status_code = 200
     return response
 
 
+def _find_lockers_by_location(serializer, location_filter, limit: int, condition=None) -> List[Dict]:
+    from project.models import db
+    from project.models.smartLocker import SmartLocker
+
+    # The locker ID and location are always selected (last) for sorting and for the exact check on the candidates, even if not requested.
+    query = location_filter.apply(db.session.query(*serializer.columns, SmartLocker.id, SmartLocker.lat, SmartLocker.lon))
+    if condition is not None:
+        query = query.filter(condition)
+    if location_filter.center is None:
+        # The bounding box conditions are exact, so lockers are sorted by ID and limited by the DB.
+        query = query.order_by(SmartLocker.id).limit(limit)
+    matches = [(location_filter.distance(row[-2], row[-1]), row) for row in query if location_filter.matches(row[-2], row[-1])]
+    matches.sort(key=lambda match: (match[0], match[1][-3]) if match[0] is not None else match[1][-3])
+    lockers = []
+    for (distance, row) in matches[:limit]:
+        locker = serializer.serialize(row[:-3])
+        if distance is not None:
+            locker["distance"] = round(distance, 1)
+        lockers.append(locker)
+    return lockers
+
+
+# Registers many lockers for the authenticated owner, reading them from the request body either as NDJSON (one locker per line, streamed) or as a JSON array.
+# Lockers are validated, deduplicated by name and inserted in chunks, and the result of each one is returned, in the same order.
+# Requests with more than LOCKER_BULK_MAX_RECORDS lockers are rejected before anything is inserted.
+@blueprint.route("/lockers:bulk", methods=["POST"])
+@verify_token
+def register_new_lockers_in_bulk(owner_id):
+    from project.models.smartLockerOwner import SmartLockerOwner
+    sm_owner = SmartLockerOwner.query.filter_by(name=owner_id).first()
+    if sm_owner is None:
+        return error_response(404, "Owner not found")
+
+    if flask.request.mimetype in ("application/x-ndjson", "application/jsonlines"):
+        # The stream is not read past the first record over the limit.
+        records = list(itertools.islice(_read_ndjson_records(flask.request.stream), app_config.LOCKER_BULK_MAX_RECORDS + 1))
+    else:
+        records = flask.request.get_json(silent=True)
+        if not isinstance(records, list):
+            return bad_request("The body must be a JSON array or NDJSON")
+    if len(records) > app_config.LOCKER_BULK_MAX_RECORDS:
+        return error_response(413, f"At most {app_config.LOCKER_BULK_MAX_RECORDS} lockers can be registered at once")
+
+    from project.web3 import marketplace_sc, eth_chain_id
+    results = []
+    chunk = []
+    for (index, record) in enumerate(records):
+        chunk.append((index, record))
+        if len(chunk) == app_config.LOCKER_BULK_CHUNK_SIZE:
+            results += _register_lockers_chunk(chunk, sm_owner.id, marketplace_sc.address, eth_chain_id)
+            chunk = []
+    if len(chunk) > 0:
+        results += _register_lockers_chunk(chunk, sm_owner.id, marketplace_sc.address, eth_chain_id)
+
+    response = json_response({"results": results})
+    response.status_code = 200
+    return response
+
+
+def _read_ndjson_records(stream):
+    for line in stream:
+        line = line.strip()
+        if len(line) == 0:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield _InvalidRecord(str(e))
+
+
+class _InvalidRecord():
+    def __init__(self, error_message: str):
+        self.error_message = error_message
+
+
+def _register_lockers_chunk(chunk: List[Tuple[int, Any]], owner_id: str, marketplace_address: str, chain_id: int) -> List[Dict]:
+    from project.models import db
+    from project.models.smartLocker import SmartLocker
+    results = {}
+    valid_records = []
+    for (index, record) in chunk:
+        if isinstance(record, _InvalidRecord):
+            results[index] = {"index": index, "status": 400, "message": record.error_message}
+            continue
+        (are_details_valid, error_message) = _validate_locker_details(record)
+        if are_details_valid:
+            valid_records.append((index, record))
+        else:
+            results[index] = {"index": index, "status": 400, "message": error_message}
+
+    # Only one locker with the given name can be registered for each user, also within the same request.
+    names = {record.get("name") for (_, record) in valid_records}
+    taken_names = {row[0] for row in SmartLocker.query.with_entities(SmartLocker.name).filter(SmartLocker.owner_id == owner_id, SmartLocker.name.in_(names)).all()} if len(names) > 0 else set()
+    mappings = []
+    for (index, record) in valid_records:
+        if record.get("name") in taken_names:
+            results[index] = {"index": index, "status": 409, "message": "Locker with the same name already existing"}
+            continue
+        taken_names.add(record.get("name"))
+        mappings.append((index, _create_locker_mapping(record, owner_id, marketplace_address, chain_id)))
+
+    if len(mappings) > 0:
+        try:
+            db.session.bulk_insert_mappings(SmartLocker, [mapping for (_, mapping) in mappings], return_defaults=True)
+            db.session.commit()
+        except IntegrityError:
+            # Some IDs are already taken (or repeated in the chunk): each locker is inserted on its own, to report which ones failed.
+            db.session.rollback()
+            mappings = _insert_locker_mappings_one_by_one(mappings, results)
+    for (index, mapping) in mappings:
+        results[index] = {"index": index, "status": 201, "id": mapping.get("id")}
+    return [results[index] for (index, _) in chunk]
+
+
+# Inserts each locker in its own savepoint, and returns the mappings that have been inserted. The results of the others are set in results.
+def _insert_locker_mappings_one_by_one(mappings: List[Tuple[int, Dict]], results: Dict) -> List[Tuple[int, Dict]]:
+    from project.models import db
+    from project.models.smartLocker import SmartLocker
+    inserted_mappings = []
+    for (index, mapping) in mappings:
+        try:
+            with db.session.begin_nested():
+                db.session.bulk_insert_mappings(SmartLocker, [mapping], return_defaults=True)
+        except IntegrityError:
+            results[index] = {"index": index, "status": 409, "message": "Locker with the same id already existing"}
+            continue
+        inserted_mappings.append((index, mapping))
+    db.session.commit()
+    return inserted_mappings
+
+
+def _create_locker_mapping(locker_details: Dict, owner_id: str, marketplace_address: str, chain_id: int) -> Dict:
+    location = locker_details.get("location")
+    mapping = {
+        "id": locker_details.get("id"),
+        "name": locker_details.get("name"),
+        "description": locker_details.get("description"),
+        "lat": location.get("lat"),
+        "lon": location.get("lon"),
+        "loc_description": location.get("additional_info"),
+        "icon_image": locker_details.get("icon_image"),
+        "additional_images": "\n".join(locker_details.get("additional_images")) if locker_details.get("additional_images") else None,
+        "lock_mechanism": locker_details.get("lock_mechanism"),
+        "owner_id": owner_id,
+        "chain_id": chain_id,
+        "marketplace_smart_contract_address": marketplace_address
+    }
+    return {key: value for (key, value) in mapping.items() if value is not None}
+
+
 #Just for testing
 @blueprint.route("/lockers/<string:id>", methods=["DELETE"])
 def remove_locker(id: str):
@@ -53,53 +279,61 @@ def remove_locker(id: str):
         return error_response(404)
     db.session.delete(smart_locker)
     db.session.commit()
+    from project.routes.api.thing_description import td_renderer
+    td_renderer.invalidate(id)
     message = id + ' removed'
-    response = jsonify({'message': message})
+    response = json_response({'message': message})
     response.status_code = 201
     return response
 
 def _validate_locker_details(locker_details: Dict) -> Tuple[bool, str]:
-    import urllib.parse, requests, json
-    sr_endpoint = app_config.SR_ENDPOINT_URL
-    sr_path = urllib.parse.urljoin(sr_endpoint, "api/validate")
-    response = requests.post(sr_path, json={"message": locker_details, "schema_name": app_config.SR_SCHEMA_NAME})
-    if response.status_code == 204:
-        return True, None
-    else:
-        return False, response.json()["message"]
+    return schema_validator.validate(locker_details)
 
 
 @blueprint.route("/lockers/<locker_id>", methods=["GET"])
 def get_locker_details(locker_id: str):
-    from project.models.smartLocker import SmartLocker, SmartLockerJSONSerializer
-    smart_locker = SmartLocker.query.get(locker_id)
+    from project.models import db
+    from project.models.smartLocker import SmartLocker, SmartLockerRowSerializer, SMART_LOCKER_FIELDS
+    from project.routes.api.pagination import get_fields_arg
+
+    (fields, error_message) = get_fields_arg(SMART_LOCKER_FIELDS)
+    if error_message is not None:
+        return bad_request(error_message)
+    serializer = SmartLockerRowSerializer(fields)
+    smart_locker = db.session.query(*serializer.columns).filter(SmartLocker.id == locker_id).first()
     if smart_locker is None:
         return error_response(404)
-    response: flask.Response = flask.jsonify(SmartLockerJSONSerializer().default(smart_locker))
+    response: flask.Response = json_response(serializer.serialize(smart_locker))
     response.status_code = 200
     return response
 
 
 @blueprint.route("/lockers/<locker_id>/requests", methods=["GET"])
 def get_locker_open_requests(locker_id: str):
+    from project.models import db
     from project.models.smartLocker import SmartLocker
     from project.models.marketplaceReq import MarketplaceRequest
+    from project.routes.api.pagination import get_keyset_pagination_args, paginate_by_id
     from distutils import util
 
-    smart_locker = SmartLocker.query.get(locker_id)
-    if smart_locker is None:
-        return error_response(404)
+    (after, limit, error_message) = get_keyset_pagination_args()
+    if error_message is not None:
+        return bad_request(error_message)
 
-    def filter_request(req: Tuple[int, str]) -> bool:
-        return req[1] == "open" if flask.request.args.get("only_open") is not None and util.strtobool(flask.request.args.get("only_open")) else True
+    locker_exists = db.session.query(db.exists().where(SmartLocker.id == locker_id)).scalar()
+    if not locker_exists:
+        return error_response(404)
 
-    requests = filter(filter_request, [entry for entry in MarketplaceRequest.query.with_entities(MarketplaceRequest.id,MarketplaceRequest.status).filter(MarketplaceRequest.locker_id == locker_id).all()])
+    requests_query = MarketplaceRequest.query.with_entities(MarketplaceRequest.id, MarketplaceRequest.status).filter(MarketplaceRequest.locker_id == locker_id)
+    if flask.request.args.get("only_open") is not None and util.strtobool(flask.request.args.get("only_open")):
+        requests_query = requests_query.filter(MarketplaceRequest.status == "open")
+    requests = paginate_by_id(requests_query, MarketplaceRequest.id, after, limit).all()
 
     result = {"open": [], "closed": [], "decided": []}
 
     for req in requests:
         result[req[1]].append(req[0])           # Since request possible status matches dict keys, we can use that
 
-    response: flask.Response = flask.jsonify(result)
+    response: flask.Response = json_response(result)
     response.status_code = 200
-    return response
\ No newline at end of file
+    return response
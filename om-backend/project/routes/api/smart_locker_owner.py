@@ -1,14 +1,59 @@
 import flask
+from project.json_response import json_response
 from project.routes.api import blueprint
 from project.routes.api.errors import bad_request, error_response
 
 
 @blueprint.route("/owners/<owner_id>", methods=["GET"])
 def get_owner_details(owner_id: str):
-    from project.models.smartLockerOwner import SmartLockerOwner, SmartLockerOwnerJSONSerializer
-    smart_locker_owner = SmartLockerOwner.query.get(owner_id)
+    from project.models import db
+    from project.models.smartLocker import SmartLocker
+    from project.models.smartLockerOwner import SmartLockerOwner, SmartLockerOwnerRowSerializer, SMART_LOCKER_OWNER_FIELDS
+    from project.routes.api.pagination import get_fields_arg
+
+    (fields, error_message) = get_fields_arg(SMART_LOCKER_OWNER_FIELDS)
+    if error_message is not None:
+        return bad_request(error_message)
+    serializer = SmartLockerOwnerRowSerializer(fields)
+
+    if len(serializer.columns) > 0:
+        smart_locker_owner = db.session.query(*serializer.columns).filter(SmartLockerOwner.id == owner_id).first()
+    else:
+        smart_locker_owner = () if db.session.query(db.exists().where(SmartLockerOwner.id == owner_id)).scalar() else None
     if smart_locker_owner is None:
         return error_response(404)
-    response: flask.Response = flask.jsonify(SmartLockerOwnerJSONSerializer().default(smart_locker_owner))
+    locker_ids = None
+    if serializer.include_locker_ids:
+        locker_ids = [locker_id for (locker_id,) in db.session.query(SmartLocker.id).filter(SmartLocker.owner_id == owner_id).order_by(SmartLocker.id)]
+    response: flask.Response = json_response(serializer.serialize(smart_locker_owner, locker_ids))
+    response.status_code = 200
+    return response
+
+
+@blueprint.route("/owners/<owner_id>/lockers", methods=["GET"])
+def get_owner_lockers(owner_id: str):
+    from project.models import db
+    from project.models.smartLocker import SmartLocker, SmartLockerRowSerializer, SMART_LOCKER_FIELDS
+    from project.models.smartLockerOwner import SmartLockerOwner
+    from project.routes.api.pagination import get_keyset_pagination_args, get_fields_arg, paginate_by_id
+
+    (after, limit, error_message) = get_keyset_pagination_args()
+    if error_message is None:
+        (fields, error_message) = get_fields_arg(SMART_LOCKER_FIELDS)
+    if error_message is not None:
+        return bad_request(error_message)
+    serializer = SmartLockerRowSerializer(fields)
+
+    owner_exists = db.session.query(db.exists().where(SmartLockerOwner.id == owner_id)).scalar()
+    if not owner_exists:
+        return error_response(404)
+
+    # The locker ID is always selected (last) to return the pagination cursor, even if not requested.
+    lockers_query = db.session.query(*serializer.columns, SmartLocker.id).filter(SmartLocker.owner_id == owner_id)
+    rows = paginate_by_id(lockers_query, SmartLocker.id, after, limit).all()
+    result = {"lockers": [serializer.serialize(row[:-1]) for row in rows]}
+    if limit is not None and len(rows) == limit:
+        result["next"] = rows[-1][-1]
+    response: flask.Response = json_response(result)
     response.status_code = 200
-    return response
\ No newline at end of file
+    return response
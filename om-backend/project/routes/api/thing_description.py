@@ -2,22 +2,23 @@ import flask
 from project import app_config
 from project.routes.api import blueprint
 from project.routes.api.errors import bad_request, error_response
+from project.thing_description import ThingDescriptionRenderer
+
+
+td_renderer = ThingDescriptionRenderer(app_config.TD_PATH, app_config.TD_CACHE_SIZE)
 
 
 @blueprint.route("/td/<locker_id>", methods=["GET"])
 def get_thing_description(locker_id: int):
+    from project.models import db
     from project.models.smartLocker import SmartLocker
-    smart_locker = SmartLocker.query.get(locker_id)
-    if smart_locker is None:
+    # Checked even if the TD is cached, as lockers can be deleted through other worker processes, whose cache entries are not removed.
+    locker_exists = db.session.query(db.exists().where(SmartLocker.id == locker_id)).scalar()
+    if not locker_exists:
         return error_response(404)
-    import json, os
     from project.routes.api.smart_locker import get_locker_details
-    td_path = app_config.TD_PATH
-    with open(td_path, "r") as td_file: 
-        td = json.load(td_file)
     locker_details_endpoint_url = flask.url_for("api.{}".format(get_locker_details.__name__), locker_id=locker_id)
-    td["properties"]["lockerDetails"]["href"] = locker_details_endpoint_url
-    response = flask.jsonify(td)
-    response.status_code = 200
-    response.content_type = "application/ld+json"
-    return response
+    (td, etag) = td_renderer.render(locker_id, locker_details_endpoint_url)
+    response = flask.Response(td, status=200, content_type="application/ld+json")
+    response.set_etag(etag)
+    return response.make_conditional(flask.request)
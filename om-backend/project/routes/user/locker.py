@@ -3,17 +3,16 @@ from flask_login import current_user
 from flask_babel import _
 from project.routes.user import blueprint
 from project.routes.user.form import SmartLockerForm
-from project.models.smartLocker import SmartLocker, SmartLockerJSONSerializer, SmartLockerJSONDeserializer
+from project.models.smartLocker import SmartLocker, SmartLockerJSONSerializer, SmartLockerJSONDeserializer, SmartLockerRowSerializer
 from project.models import db
 
 @blueprint.route('/user_lockers', methods=['GET'])
 def get_lockers():
     if not current_user.is_authenticated:
         return redirect(url_for('auth.login'))
-    lockers = SmartLocker.query.filter_by(owner_id=current_user.__dict__.get("id")).all()
-    serial_lockers = []
-    for locker in lockers:
-        serial_lockers.append(SmartLockerJSONSerializer().default(locker))
+    serializer = SmartLockerRowSerializer(["id", "name"])
+    lockers = db.session.query(*serializer.columns).filter(SmartLocker.owner_id == current_user.__dict__.get("id")).order_by(SmartLocker.id)
+    serial_lockers = [serializer.serialize(locker) for locker in lockers]
     return render_template('locker/lockers.html', lockers=serial_lockers)
 
 
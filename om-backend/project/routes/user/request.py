@@ -1,5 +1,5 @@
 from datetime import datetime
-from flask import render_template, request, json, redirect, url_for, session
+from flask import render_template, request, json, redirect, url_for, session, flash
 from flask_babel import _
 from flask_login import current_user
 from project.models.smartLocker import SmartLocker
@@ -7,6 +7,7 @@ from project.routes.user import blueprint
 from project.routes.user.form import RequestForm, OfferSelectionForm
 
 from project import app_config as config
+from project.json_response import json_response
 
 TIMESTAMP_FORMAT = '%d.%m.%Y %H:%M'
 
@@ -50,26 +51,8 @@ def get_requests():
     if not current_user.is_authenticated:
         return redirect(url_for('auth.login'))
 
-    from project.web3 import marketplace_sc
-    request_ids = []
-    user_lockers = SmartLocker.query.filter_by(owner_id=current_user.__dict__.get("id")).all()
-    for locker in user_lockers:
-        from project.routes.api.smart_locker import get_locker_open_requests
-        locker_requests_response = get_locker_open_requests(locker.id)
-        if locker_requests_response.status_code == 200:
-            response_data = locker_requests_response.get_json()
-            for status in ['open', 'decided', 'closed']:
-                for request_id in response_data.get(status):
-                    request_details = marketplace_sc.functions.getRequest(request_id).call()
-                    if request_details[3] == config.USER_ETHEREUM_ADDRESS:
-                        request_ids.append(request_id)
-
-    requests = []
-    for request_id in request_ids:
-        req = marketplace_sc.functions.getRequest(request_id).call()
-        if req[0] == 0:
-            req_details = marketplace_sc.functions.getRequestExtra(request_id).call()
-            requests.append(BasicRequest(request_id, req_details[0], req_details[2], req_details[3]))
+    from project.dashboard import get_owner_requests
+    requests = [BasicRequest(request_id, status, duration, amount) for (request_id, status, duration, amount) in get_owner_requests(current_user.__dict__.get("id"), config.USER_ETHEREUM_ADDRESS)]
 
     details_path_prefix = url_for('.get_requests')
     return render_template('request/requests.html', details_path_prefix=details_path_prefix, requests=requests)
@@ -96,7 +79,14 @@ def request_details(id):
     form = OfferSelectionForm(request_details=request_details)
     if form.validate_on_submit():
         selected = [int(i) for i in request.form.getlist('select')]
-        marketplace_sc.functions.decideRequest(id, selected).transact({"from": config.USER_ETHEREUM_ADDRESS, "gas": 2000000, "gasPrice": 1})
+        from project.web3 import transaction_jobs
+
+        def decide_request(job):
+            transaction_jobs.transact(job, marketplace_sc.functions.decideRequest(id, selected), config.USER_ETHEREUM_ADDRESS)
+            return {"request_id": id}
+
+        job_id = transaction_jobs.enqueue("decideRequest", current_user.__dict__.get("id"), decide_request)
+        flash(_('Decision for request %(id)s submitted (job %(job_id)s).', id=id, job_id=job_id))
 
     allow_offer_selection = len(offers) > 0
     accepted_offers = marketplace_sc.functions.getRequestDecision(id).call()
@@ -125,14 +115,8 @@ def create_request():
         from project.routes.user.token import _fetch_token
         token = json.loads(_fetch_token(config.USER_ETHEREUM_ADDRESS))
 
-        from project.web3 import marketplace_sc
+        from project.web3 import marketplace_sc, transaction_jobs
         deadline = datetime.combine(form.deadline_date.data, form.deadline_time.data).timestamp()
-        contract = marketplace_sc.functions.submitAuthorisedRequest(token.get('digest'), token.get('signature'), token.get('nonce'), int(deadline))
-        tx_hash = contract.transact({"from": config.USER_ETHEREUM_ADDRESS, "gas": 2000000, "gasPrice": 1})
-
-        from project.web3 import web3_instance
-        receipt = web3_instance.eth.getTransactionReceipt(tx_hash)
-
         duration = datetime.combine(form.end_date.data, form.end_time.data).timestamp() - datetime.combine(form.start_date.data, form.start_time.data).timestamp()
         start_time_epoch = datetime.combine(form.start_date.data, form.start_time.data).timestamp()
         instant_rent_rules = []
@@ -142,11 +126,36 @@ def create_request():
         request_data = [int(start_time_epoch), int(duration), form.cost_per_minute.data]
         request_data += instant_rent_rules
         request_data.append(form.locker_id.data)
-        request_id = marketplace_sc.events.RequestAdded().processReceipt(receipt)[0].args.requestID
-        marketplace_sc.functions.submitRequestArrayExtra(request_id, request_data).transact({"from": config.USER_ETHEREUM_ADDRESS, "gas": 2000000, "gasPrice": 1})
-        return redirect(url_for('.request_details', id=request_id))
+
+        # The request extra can only be submitted once the request has been mined, as it needs the request ID.
+        def submit_request(job):
+            receipt = transaction_jobs.transact(job, marketplace_sc.functions.submitAuthorisedRequest(token.get('digest'), token.get('signature'), token.get('nonce'), int(deadline)), config.USER_ETHEREUM_ADDRESS)
+            request_id = marketplace_sc.events.RequestAdded().processReceipt(receipt)[0].args.requestID
+            transaction_jobs.transact(job, marketplace_sc.functions.submitRequestArrayExtra(request_id, request_data), config.USER_ETHEREUM_ADDRESS)
+            return {"request_id": request_id}
+
+        job_id = transaction_jobs.enqueue("submitRequest", current_user.__dict__.get("id"), submit_request)
+        # API clients get the job status to poll, the HTML form goes back to the request list.
+        if request.accept_mimetypes.best == 'application/json':
+            response = json_response(transaction_jobs.get_job(job_id, current_user.__dict__.get("id")), 202)
+            response.headers['Location'] = url_for('.get_transaction_job', job_id=job_id)
+            return response
+        flash(_('Request creation submitted (job %(job_id)s). The request will be listed once it is confirmed.', job_id=job_id))
+        return redirect(url_for('.get_requests'))
 
     forward_path = url_for('user.get_lockers') if selected_locker_id else url_for('.get_requests')
     return render_template('request/create_request.html', title=_('Create request'), lockers=lockers, selected_locker=selected_locker_id, forward_path=forward_path, form=form)
 
 
+# Polling endpoint for the status of the transactions submitted on behalf of the logged owner.
+@blueprint.route('/transactions/<job_id>', methods=['GET'])
+def get_transaction_job(job_id):
+    if not current_user.is_authenticated:
+        return redirect(url_for('auth.login'))
+
+    from project.web3 import transaction_jobs
+    from project.routes.api.errors import error_response
+    job = transaction_jobs.get_job(job_id, current_user.__dict__.get("id"))
+    if job is None:
+        return error_response(404)
+    return json_response(job)
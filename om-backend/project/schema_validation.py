@@ -0,0 +1,108 @@
+import ast, json, threading, time, urllib.parse
+from typing import Dict, Tuple
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+
+
+# Validates smart locker details in-process, against the schema registered in the SR component.
+# The SR component serves schemas by id: the id is resolved from the schema name with the schema list, then the schema is fetched and compiled once.
+# It is revalidated with its ETag at most once per refresh interval, and the id is resolved again if the schema is not found anymore.
+# Until the schema can be fetched, the local copy (the same that is registered in the SR at startup) is used. If a changed schema cannot be compiled locally, details are validated by the SR component.
+class SchemaValidationClient(object):
+
+    def __init__(self, sr_endpoint: str, schema_name: str, local_schema_path: str, refresh_interval: float, timeout=None):
+        self.sr_endpoint = sr_endpoint
+        self.schemas_url = urllib.parse.urljoin(sr_endpoint, "api/schemas")
+        self.validation_url = urllib.parse.urljoin(sr_endpoint, "api/validate")
+        self.schema_name = schema_name
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self._schema_url = None
+        self._etag = None
+        self._last_refresh = None
+        self._use_remote_validation = False
+        self._lock = threading.Lock()
+        with open(local_schema_path, "r") as local_schema_file:
+            self._validator = _compile_schema(json.load(local_schema_file))
+
+    def validate(self, details: Dict) -> Tuple[bool, str]:
+        self._refresh_schema_if_needed()
+        if self._use_remote_validation:
+            result = self._validate_remotely(details)
+            if result is not None:
+                return result
+        error = best_match(self._validator.iter_errors(details))
+        if error is None:
+            return True, None
+        return False, error.message
+
+    def _refresh_schema_if_needed(self):
+        with self._lock:
+            if self._last_refresh is not None and time.monotonic() - self._last_refresh < self.refresh_interval:
+                return
+            self._last_refresh = time.monotonic()
+            if self._schema_url is None:
+                self._schema_url = self._resolve_schema_url()
+                if self._schema_url is None:
+                    return          # SR not reachable or schema not registered: keep using the current validator
+            headers = {"Accept": "application/json"}
+            if self._etag is not None:
+                headers["If-None-Match"] = self._etag
+            from project.authorization_server import get_http_client
+            response = get_http_client().request("GET", self._schema_url, self.timeout, headers=headers)
+            if response.status_code == 404:
+                self._schema_url = None     # The schema has been removed or registered again with a new id
+                self._etag = None
+                return
+            if response.status_code != 200:
+                return              # 304 (not changed) or SR not reachable: keep using the current validator
+            try:
+                self._validator = _compile_schema(_parse_schema(response.json()))
+                self._use_remote_validation = False
+            except Exception:
+                self._use_remote_validation = True
+            self._etag = response.headers.get("ETag")
+
+    # Returns the URL of the schema with the configured name, or None if the SR component is not reachable or the schema is not registered.
+    def _resolve_schema_url(self) -> str:
+        from project.authorization_server import get_http_client
+        response = get_http_client().request("GET", self.schemas_url, self.timeout, headers={"Accept": "application/json"})
+        if response.status_code != 200:
+            return None
+        for schema_id, name in response.json().items():
+            if name == self.schema_name:
+                return urllib.parse.urljoin(self.sr_endpoint, "api/schema/" + urllib.parse.quote(str(schema_id), safe=""))
+        return None
+
+    # Returns None if the SR component is not reachable or does not answer with a validation result (204, or 400 with the error message), so that details are validated locally.
+    def _validate_remotely(self, details: Dict) -> Tuple[bool, str]:
+        from project.authorization_server import get_http_client
+        response = get_http_client().request("POST", self.validation_url, self.timeout, json={"message": details, "schema_name": self.schema_name})
+        if response.status_code == 204:
+            return True, None
+        if response.status_code != 400:
+            return None
+        try:
+            message = response.json()["message"]
+        except (ValueError, KeyError, TypeError):
+            return None
+        if not isinstance(message, str):
+            return None
+        return False, message
+
+
+# The SR component stores schemas as the string representation of the submitted dictionary.
+def _parse_schema(body) -> Dict:
+    if isinstance(body, str):
+        try:
+            return json.loads(body)
+        except ValueError:
+            return ast.literal_eval(body)
+    return body
+
+
+def _compile_schema(schema: Dict):
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
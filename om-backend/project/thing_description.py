@@ -0,0 +1,61 @@
+import hashlib, json, os, threading, time
+from collections import OrderedDict
+from typing import Tuple
+
+_HREF_PLACEHOLDER = "__SMAUG_LOCKER_DETAILS_HREF__"
+
+
+# Renders the Thing Description of the smart lockers from the TD template.
+# The template is parsed and serialised once, and reloaded when the file changes. Each locker TD is then obtained by splicing the locker details URL into the serialised template,
+# and the result is kept, along with its ETag, in an LRU cache.
+class ThingDescriptionRenderer(object):
+
+    def __init__(self, td_path: str, cache_size: int, reload_check_interval: float = 1):
+        self.td_path = td_path
+        self.cache_size = cache_size
+        self.reload_check_interval = reload_check_interval
+        self._template_prefix = None
+        self._template_suffix = None
+        self._template_mtime = None
+        self._last_reload_check = None
+        self._rendered = OrderedDict()              # locker ID -> (body, ETag)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._reload_template_if_changed()
+
+    # Returns the serialised TD for the given locker, and its (strong) ETag.
+    def render(self, locker_id, locker_details_url: str) -> Tuple[bytes, str]:
+        locker_id = str(locker_id)
+        with self._lock:
+            self._reload_template_if_changed()
+            rendered = self._rendered.get(locker_id)
+            if rendered is not None:
+                self._rendered.move_to_end(locker_id)
+                return rendered
+            body = self._template_prefix + json.dumps(locker_details_url).encode() + self._template_suffix
+            rendered = (body, hashlib.sha256(body).hexdigest())
+            if self.cache_size > 0:
+                self._rendered[locker_id] = rendered
+                while len(self._rendered) > self.cache_size:
+                    self._rendered.popitem(last=False)
+            return rendered
+
+    def invalidate(self, locker_id):
+        with self._lock:
+            self._rendered.pop(str(locker_id), None)
+
+    def _reload_template_if_changed(self):
+        now = time.monotonic()
+        if self._last_reload_check is not None and now - self._last_reload_check < self.reload_check_interval:
+            return
+        self._last_reload_check = now
+        mtime = os.stat(self.td_path).st_mtime
+        if mtime == self._template_mtime:
+            return
+        with open(self.td_path, "r") as td_file:
+            td = json.load(td_file)
+        td["properties"]["lockerDetails"]["href"] = _HREF_PLACEHOLDER
+        serialised_td = json.dumps(td, separators=(",", ":")).encode()
+        (self._template_prefix, self._template_suffix) = serialised_td.split(json.dumps(_HREF_PLACEHOLDER).encode(), 1)
+        self._template_mtime = mtime
+        self._rendered.clear()
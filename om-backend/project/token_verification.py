@@ -0,0 +1,140 @@
+import hashlib, heapq, threading, time, jwt
+from collections import OrderedDict
+
+
+# LRU cache of the claims of validated tokens, keyed by the token digest so that tokens are never kept in memory.
+# Entries expire after the given TTL, or when the token itself expires if earlier. Revoked tokens are remembered until they expire, or indefinitely if they never do.
+# Expired revocations are pruned in order of expiration, with a heap. At most max_revoked revocations are kept: when the limit is reached, the oldest one is forgotten.
+class TokenValidationCache(object):
+
+    def __init__(self, max_size: int, ttl: float, max_revoked: int = 10000):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_revoked = max_revoked
+        self._entries = OrderedDict()               # digest -> (claims, expiry time)
+        self._revoked = OrderedDict()               # digest -> expiry time of the revoked token, oldest revocation first
+        self._revoked_expirations = []              # Heap of (expiry time, digest) of the revoked tokens that expire
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> dict:
+        digest = _digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            (claims, expires_at) = entry
+            if expires_at <= time.time():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return claims
+
+    def put(self, token: str, claims: dict):
+        if self.max_size <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if isinstance(claims.get("exp"), (int, float)):
+            expires_at = min(expires_at, claims["exp"])
+        digest = _digest(token)
+        with self._lock:
+            if digest in self._revoked:
+                return
+            self._entries[digest] = (claims, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def revoke(self, token: str, expires_at: float = None):
+        digest = _digest(token)
+        now = time.time()
+        with self._lock:
+            self._entries.pop(digest, None)
+            while len(self._revoked_expirations) > 0 and self._revoked_expirations[0][0] <= now:
+                (until, revoked_digest) = heapq.heappop(self._revoked_expirations)
+                if self._revoked.get(revoked_digest) == until:
+                    del self._revoked[revoked_digest]
+            if expires_at is None:
+                self._revoked[digest] = float("inf")
+            elif expires_at > now and self._revoked.get(digest, 0) < expires_at:
+                self._revoked[digest] = expires_at
+                heapq.heappush(self._revoked_expirations, (expires_at, digest))
+            else:
+                return
+            self._revoked.move_to_end(digest)
+            while len(self._revoked) > self.max_revoked:
+                self._revoked.popitem(last=False)
+            # The heap still holds the forgotten revocations until they expire: it is rebuilt if they are the majority.
+            if len(self._revoked_expirations) > 2 * max(self.max_revoked, 1):
+                self._revoked_expirations = [(until, revoked_digest) for (revoked_digest, until) in self._revoked.items() if until != float("inf")]
+                heapq.heapify(self._revoked_expirations)
+
+    def is_revoked(self, token: str) -> bool:
+        digest = _digest(token)
+        with self._lock:
+            until = self._revoked.get(digest)
+            return until is not None and until > time.time()
+
+
+# Verifies RS256 tokens in-process against the public key of the authorization server.
+# The key is loaded once from a file or an HTTP(S) URL, and loaded again if a signature check fails, at most once per refresh interval, to follow key rotations.
+class LocalTokenVerifier(object):
+
+    def __init__(self, public_key_location: str, refresh_interval: float, verify_expiration: bool, timeout=None):
+        self.public_key_location = public_key_location
+        self.refresh_interval = refresh_interval
+        self.verify_expiration = verify_expiration
+        self.timeout = timeout
+        self._public_key = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    # Returns the token claims if the token is valid, None otherwise. Raises IOError if the public key cannot be loaded.
+    def verify(self, token: str) -> dict:
+        public_key = self._get_public_key()
+        try:
+            return self._decode(token, public_key)
+        except jwt.InvalidSignatureError:
+            refreshed_public_key = self._refresh_public_key()
+            if refreshed_public_key is None or refreshed_public_key == public_key:
+                return None
+        except jwt.InvalidTokenError:
+            return None
+        try:
+            return self._decode(token, refreshed_public_key)
+        except jwt.InvalidTokenError:
+            return None
+
+    def _decode(self, token: str, public_key: bytes) -> dict:
+        return jwt.decode(token, public_key, algorithms=["RS256"], options={"verify_exp": self.verify_expiration, "verify_aud": False})
+
+    def _get_public_key(self) -> bytes:
+        with self._lock:
+            if self._public_key is None:
+                self._public_key = self._load_public_key()
+                self._loaded_at = time.monotonic()
+            return self._public_key
+
+    def _refresh_public_key(self) -> bytes:
+        with self._lock:
+            if time.monotonic() - self._loaded_at < self.refresh_interval:
+                return None
+            self._loaded_at = time.monotonic()
+            try:
+                self._public_key = self._load_public_key()
+            except IOError:
+                pass
+            return self._public_key
+
+    def _load_public_key(self) -> bytes:
+        if self.public_key_location.startswith(("http://", "https://")):
+            from project.authorization_server import get_http_client
+            response = get_http_client().request("GET", self.public_key_location, self.timeout)
+            if response.status_code != 200:
+                raise IOError(f"Public key could not be fetched from {self.public_key_location} (status {response.status_code}).")
+            return response.content
+        with open(self.public_key_location, mode="rb") as public_key_file:
+            return public_key_file.read()
+
+
+def _digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
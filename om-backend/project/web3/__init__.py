@@ -1,10 +1,14 @@
 from flask import Flask
 from web3 import Web3
 from web3.contract import Contract
+from project.web3.token_signer import MarketplaceTokenSigner
+from project.web3.transactions import TransactionJobQueue
 
 web3_instance: Web3 = None
 marketplace_sc: Contract = None
 eth_chain_id: int = None
+token_signer: MarketplaceTokenSigner = None
+transaction_jobs: TransactionJobQueue = None
 
 def init_app(app: Flask): 
     import json
@@ -16,4 +20,8 @@ def init_app(app: Flask):
     with open(sc_abi, "r") as f:
         sc_api_loaded = json.load(f)
     global marketplace_sc
-    marketplace_sc = web3_instance.eth.contract(sc_address, abi=sc_api_loaded)
\ No newline at end of file
+    marketplace_sc = web3_instance.eth.contract(sc_address, abi=sc_api_loaded)
+    global token_signer
+    token_signer = MarketplaceTokenSigner(web3_instance, marketplace_sc, app.config.get("ETHEREUM_MARKETPLACE_OWNER_ADDRESS"), app.config.get("ETHEREUM_MARKETPLACE_OWNER_PRIVATE_KEY"), app.config.get("MARKETPLACE_TOKEN_POOL_SIZE"), app.config.get("MARKETPLACE_TOKEN_POOL_MAX_REQUESTORS"), app.logger)
+    global transaction_jobs
+    transaction_jobs = TransactionJobQueue(web3_instance, app.config.get("ETHEREUM_TRANSACTION_GAS"), app.config.get("ETHEREUM_TRANSACTION_GAS_PRICE"), app.config.get("ETHEREUM_RECEIPT_TIMEOUT"), app.config.get("TRANSACTION_JOBS_KEPT"), app.logger)
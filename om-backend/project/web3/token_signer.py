@@ -0,0 +1,122 @@
+import logging, queue, secrets, threading
+from collections import OrderedDict, deque
+from web3 import Web3
+from web3.contract import Contract
+
+
+# Generates the signed access tokens needed to call authorised functions of the marketplace smart contract.
+# If the manager private key is given, tokens are signed in-process, otherwise the manager account on the node is asked to sign them.
+# The 4-byte selector of each function is computed only once.
+class MarketplaceTokenSigner():
+
+    def __init__(self, web3: Web3, contract: Contract, manager_account: str, manager_private_key: str = None, pool_size: int = 0, max_pooled_requestors: int = 0, logger: logging.Logger = None):
+        self.web3 = web3
+        self.contract = contract
+        self.manager_account = manager_account
+        self.manager_private_key = manager_private_key
+        self.pool_size = pool_size
+        self.max_pooled_requestors = max_pooled_requestors
+        self._logger = logger if logger is not None else logging.getLogger(__name__)
+        self._selectors = {}
+        self._pools = OrderedDict()                             # (function name, requestor) -> pre-signed tokens, in LRU order
+        self._pools_lock = threading.Lock()
+        # Pending refills are bounded and deduplicated, as requests for new requestors would otherwise make the node sign tokens without limits
+        self._refill_requests = queue.Queue(maxsize=max(max_pooled_requestors, 1))
+        self._pending_refills = set()
+        if manager_private_key is not None:
+            from eth_account import Account
+            local_manager_account = Account.from_key(manager_private_key).address
+            if local_manager_account.lower() != manager_account.lower():
+                self._logger.warning(f"The marketplace manager private key is for account {local_manager_account}, not {manager_account}.")
+            self.manager_account = local_manager_account
+        if pool_size > 0 and max_pooled_requestors > 0:
+            threading.Thread(target=self._refill_pools, daemon=True).start()
+
+    # Returns a new token for the given requestor, taking it from the pool of pre-signed tokens if any is available.
+    def generate_token(self, function_name: str, requestor_account: str) -> dict:
+        token = self._take_pooled_token(function_name, requestor_account)
+        if token is None:
+            token = self._sign_token(function_name, requestor_account)
+        if self.pool_size > 0 and self.max_pooled_requestors > 0:
+            self._request_refill(function_name, requestor_account)
+        return token
+
+    def _request_refill(self, function_name: str, requestor_account: str):
+        with self._pools_lock:
+            if (function_name, requestor_account) in self._pending_refills:
+                return
+            try:
+                self._refill_requests.put_nowait((function_name, requestor_account))
+            except queue.Full:
+                self._logger.debug(f"Too many pending token refills, tokens for {requestor_account} not pre-signed.")
+                return
+            self._pending_refills.add((function_name, requestor_account))
+
+    def _sign_token(self, function_name: str, requestor_account: str) -> dict:
+        function_abi_encoded = self._get_function_selector(function_name)
+        random_nonce = "0x" + secrets.token_hex(32)
+        message = random_nonce + function_abi_encoded + requestor_account[2:] + self.contract.address[2:]
+        digest = Web3.solidityKeccak(["string", "bytes", "bytes", "bytes", "bytes"], ["\x19Ethereum Signed Message:\n76", random_nonce, "0x" + function_abi_encoded, requestor_account, self.contract.address]).hex()
+        if self.manager_private_key is not None:
+            from eth_account import Account
+            from eth_account.messages import encode_defunct
+            signature = Account.sign_message(encode_defunct(hexstr=message), self.manager_private_key).signature.hex()
+        else:
+            signature = self.web3.eth.sign(self.manager_account, hexstr=message).hex()
+        signature = update_signature_against_malleability(signature)
+
+        return {"digest": digest, "encoded": message, "signature": signature, "nonce": random_nonce}
+
+    def _get_function_selector(self, function_name: str) -> str:
+        selector = self._selectors.get(function_name)
+        if selector is None:
+            from eth_utils import function_abi_to_4byte_selector
+            function_abi = self.contract.get_function_by_name(function_name).abi
+            selector = function_abi_to_4byte_selector(function_abi).hex()
+            self._selectors[function_name] = selector
+        return selector
+
+    def _take_pooled_token(self, function_name: str, requestor_account: str) -> dict:
+        with self._pools_lock:
+            pool = self._pools.get((function_name, requestor_account))
+            if pool is None or len(pool) == 0:
+                return None
+            self._pools.move_to_end((function_name, requestor_account))
+            return pool.popleft()
+
+    # Signed tokens include the requestor address, so tokens can only be pre-signed for requestors that have already asked for one.
+    def _refill_pools(self):
+        while True:
+            (function_name, requestor_account) = self._refill_requests.get()
+            try:
+                while self._missing_pooled_tokens(function_name, requestor_account) > 0:
+                    token = self._sign_token(function_name, requestor_account)
+                    with self._pools_lock:
+                        pool = self._pools.get((function_name, requestor_account))
+                        if pool is None:
+                            pool = self._pools[(function_name, requestor_account)] = deque()
+                        pool.append(token)
+                        while len(self._pools) > self.max_pooled_requestors:
+                            self._pools.popitem(last=False)
+            except Exception:
+                self._logger.exception(f"Could not pre-sign tokens for {requestor_account}.")
+            finally:
+                with self._pools_lock:
+                    self._pending_refills.discard((function_name, requestor_account))
+
+    def _missing_pooled_tokens(self, function_name: str, requestor_account: str) -> int:
+        with self._pools_lock:
+            pool = self._pools.get((function_name, requestor_account))
+            return self.pool_size - (len(pool) if pool is not None else 0)
+
+
+# From https://github.com/OpenZeppelin/openzeppelin-contracts/blob/master/contracts/cryptography/ECDSA.sol#L50 (translated from JS)
+def update_signature_against_malleability(signature: str) -> str:
+    v = "0x" + signature[-2:]
+    v_decimal = int(v, 16)
+
+    if v_decimal <= 1:
+        v_decimal += 27
+        v = Web3.toHex(v_decimal)
+
+    return signature[:-2] + v[2:]
@@ -0,0 +1,99 @@
+import logging, queue, threading, time, uuid
+from collections import OrderedDict
+from typing import Callable
+from web3 import Web3
+
+
+# A sequence of transactions submitted on behalf of an owner. Its status goes from "queued" to "running", and then to either "done" or "failed".
+class TransactionJob():
+
+    def __init__(self, kind: str, owner_id: str, run: Callable):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.owner_id = owner_id
+        self.status = "queued"
+        self.transactions = []                          # Hashes of the submitted transactions, in order
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self._run = run
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "transactions": list(self.transactions),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
+
+
+# Submits the transactions of the queued jobs from a background thread, so that web workers never wait for blocks to be mined.
+# Jobs are run one at a time, which keeps the nonces of the sending account in order, and the last finished jobs are kept to report their status.
+class TransactionJobQueue():
+
+    def __init__(self, web3: Web3, gas: int, gas_price: int, receipt_timeout: float, max_finished_jobs: int, logger: logging.Logger = None):
+        self.web3 = web3
+        self.gas = gas
+        self.gas_price = gas_price
+        self.receipt_timeout = receipt_timeout
+        self.max_finished_jobs = max_finished_jobs
+        self._logger = logger if logger is not None else logging.getLogger(__name__)
+        self._queue = queue.Queue()
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        threading.Thread(target=self._run_jobs, daemon=True).start()
+
+    # Queues a job and returns its ID. `run` is called from the worker thread with the job as argument, sends its transactions with `transact`, and returns the job result.
+    def enqueue(self, kind: str, owner_id: str, run: Callable) -> str:
+        job = TransactionJob(kind, owner_id, run)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._queue.put(job)
+        return job.id
+
+    # Returns the status of the job, or None if the job does not exist or has been queued by another owner.
+    def get_job(self, job_id: str, owner_id: str) -> dict:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job is not None and job.owner_id == owner_id else None
+
+    # Sends the transaction for the given contract function and waits for it to be mined. Returns the receipt, and raises an exception if the transaction reverted.
+    def transact(self, job: TransactionJob, contract_function, sender: str):
+        tx_hash = contract_function.transact({"from": sender, "gas": self.gas, "gasPrice": self.gas_price})
+        with self._lock:
+            job.transactions.append(tx_hash.hex())
+            job.updated_at = time.time()
+        receipt = self.web3.eth.waitForTransactionReceipt(tx_hash, timeout=self.receipt_timeout)
+        if receipt.status == 0:
+            raise RuntimeError(f"Transaction {tx_hash.hex()} reverted.")
+        return receipt
+
+    def _run_jobs(self):
+        while True:
+            job = self._queue.get()
+            self._set_job_status(job, "running")
+            try:
+                result = job._run(job)
+                self._set_job_status(job, "done", result=result)
+            except Exception as e:
+                self._logger.exception(f"Transaction job {job.id} ({job.kind}) failed.")
+                self._set_job_status(job, "failed", error=str(e))
+            self._discard_old_jobs()
+
+    def _set_job_status(self, job: TransactionJob, status: str, result=None, error=None):
+        with self._lock:
+            job.status = status
+            job.result = result
+            job.error = error
+            job.updated_at = time.time()
+
+    def _discard_old_jobs(self):
+        with self._lock:
+            finished_job_ids = [job_id for (job_id, job) in self._jobs.items() if job.status in ("done", "failed")]
+            for job_id in finished_job_ids[:max(len(finished_job_ids) - self.max_finished_jobs, 0)]:
+                del self._jobs[job_id]
@@ -0,0 +1,38 @@
+import os
+import sys
+sys.path.append('../')
+
+import time
+import uuid
+import jwt
+import project
+from project.config import MockedDevConfig
+
+# The app is created without the SR component, the chain and the Kafka broker. Marketplace data is added directly to the DB, or by calling the Kafka handlers.
+config = MockedDevConfig()
+config.MARKETPLACE_BROKER_URL = None
+# Tokens are verified in-process, against the public key matching this private key (by default, the key pair of the IAA tests).
+config.TOKEN_VERIFICATION_MODE = "local"
+AS_PRIVATE_KEY_LOCATION = os.environ.get("AS_PRIVATE_KEY_LOCATION", os.path.abspath(os.path.join("..", "om-iaa", "tests", "keys", "as_private_key.pem")))
+project.app_config = config
+# The routes read the configuration when imported: they are imported now, so that they use this configuration even if other test modules replace it.
+import project.routes.api, project.routes.user
+
+
+# Each app has its own in-memory DB, with the mock data only.
+def create_local_app():
+    from project import json_response, kafka, models, routes
+    app = project._create_and_setup_flask_app(config)
+    json_response.init_app(app)
+    models.init_app(app)
+    routes.init_app(app)
+    kafka.init_app(app)
+    return app
+
+
+# Returns a new token for the owner with the given name, signed as by the authorization server.
+def create_local_token(owner_name: str) -> str:
+    with open(AS_PRIVATE_KEY_LOCATION, mode="rb") as key_file:
+        signing_key = key_file.read()
+    token = jwt.encode({"aud": owner_name, "jti": uuid.uuid4().hex, "iat": int(time.time())}, signing_key, algorithm="RS256")
+    return token.decode() if isinstance(token, bytes) else token
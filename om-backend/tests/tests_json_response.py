@@ -0,0 +1,39 @@
+import unittest
+import json
+from unittest import mock
+import project.json_response
+from local_app import create_local_app, create_local_token
+from project.json_response import JSONResponseEncoder
+
+
+class JSONResponses(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_local_app()
+        self.client = self.app.test_client()
+        # Indented output, to tell the responses encoded by the configured encoder from the ones of flask.jsonify.
+        self.encoder_patch = mock.patch.object(project.json_response, "encoder", JSONResponseEncoder("json", compact=False))
+        self.encoder_patch.start()
+
+    def tearDown(self):
+        self.encoder_patch.stop()
+
+    def _assert_encoded(self, response, status_code):
+        self.assertEqual(response.status_code, status_code)
+        self.assertEqual(response.mimetype, "application/json")
+        self.assertEqual(response.data, JSONResponseEncoder("json", compact=False).dumps(json.loads(response.data)))
+
+    def test_api_responses(self):
+        self._assert_encoded(self.client.get("/api/lockers/1"), 200)
+        self._assert_encoded(self.client.get("/api/marketplace/consumer/status"), 200)
+        self._assert_encoded(self.client.post("/api/test_route", headers={"Authorization": create_local_token("User 1")}), 200)
+        self._assert_encoded(self.client.delete("/api/lockers/4"), 201)
+
+    def test_error_responses(self):
+        self._assert_encoded(self.client.get("/api/lockers/999"), 404)
+        self._assert_encoded(self.client.get("/api/owners/user_1/lockers", query_string={"limit": 0}), 400)
+        self._assert_encoded(self.client.post("/api/test_route"), 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
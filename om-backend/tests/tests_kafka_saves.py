@@ -0,0 +1,82 @@
+import unittest
+from local_app import create_local_app
+from project import kafka
+from project.db_utils import insert_ignoring_duplicates
+from project.models import db
+from project.models.marketplaceReq import MarketplaceRequest
+from project.models.marketplaceOff import MarketplaceOffer
+from project.models.lockerBooking import LockerBooking
+
+LOCKER_ID = 1
+REQUEST_ID = 100
+OFFER_ID = 200
+REQUEST_ROW = {"id": REQUEST_ID, "start_time": 1000, "end_time": 2000, "auction_min_price_per_slot": 1, "locker_id": LOCKER_ID, "status": "open"}
+
+
+class KafkaSaves(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_local_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.session.add(MarketplaceRequest(**REQUEST_ROW))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def test_insert_ignoring_duplicates(self):
+        self.assertEqual(insert_ignoring_duplicates(db, MarketplaceRequest, []), 0)
+        # Redelivered: discarded by the DB, and the existing row is not changed.
+        self.assertEqual(insert_ignoring_duplicates(db, MarketplaceRequest, [dict(REQUEST_ROW, status="closed")]), 0)
+        self.assertEqual(MarketplaceRequest.query.get(REQUEST_ID).status, "open")
+        # Only the new rows of a batch are inserted.
+        self.assertEqual(insert_ignoring_duplicates(db, MarketplaceRequest, [REQUEST_ROW, dict(REQUEST_ROW, id=REQUEST_ID + 1)]), 1)
+        self.assertEqual(MarketplaceRequest.query.filter(MarketplaceRequest.locker_id == LOCKER_ID).count(), 2)
+
+    def test_save_request_state_twice(self):
+        # Request details as returned by getRequestExtra: start time, duration in minutes, minimum price, instant rent rules and locker ID.
+        request_details = [0, 5000, 1, 1, [], LOCKER_ID]
+        kafka._save_request_state(self.app, REQUEST_ID + 1, request_details)
+        kafka._save_request_state(self.app, REQUEST_ID + 1, request_details)
+        saved_request = MarketplaceRequest.query.get(REQUEST_ID + 1)
+        self.assertEqual((saved_request.start_time, saved_request.end_time), (5000, 65000))
+        self.assertEqual(MarketplaceRequest.query.filter(MarketplaceRequest.locker_id == LOCKER_ID).count(), 2)
+
+    def test_save_new_offer_twice(self):
+        kafka._save_new_offer(self.app, OFFER_ID, REQUEST_ID)
+        kafka._save_new_offer(self.app, OFFER_ID, REQUEST_ID)
+        self.assertEqual(MarketplaceOffer.query.filter(MarketplaceOffer.request_id == REQUEST_ID).count(), 1)
+
+
+class BookingSaves(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_local_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        # Offer 200 has no interval of its own, offer 201 is for [1200, 1500).
+        db.session.add(MarketplaceRequest(**REQUEST_ROW))
+        db.session.add_all([MarketplaceOffer(id=OFFER_ID, request_id=REQUEST_ID), MarketplaceOffer(id=OFFER_ID + 1, request_id=REQUEST_ID, start_time=1200, end_time=1500)])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def test_save_request_bookings_twice(self):
+        kafka._save_request_bookings(self.app, REQUEST_ID, [OFFER_ID, OFFER_ID + 1])
+        kafka._save_request_bookings(self.app, REQUEST_ID, [OFFER_ID, OFFER_ID + 1])
+        bookings = LockerBooking.query.order_by(LockerBooking.offer_id).all()
+        # Offers without an interval book the locker for the whole request interval.
+        self.assertEqual([(booking.offer_id, booking.locker_id, booking.start_time, booking.end_time) for booking in bookings], [(OFFER_ID, LOCKER_ID, 1000, 2000), (OFFER_ID + 1, LOCKER_ID, 1200, 1500)])
+
+    def test_save_bookings_of_unknown_offers(self):
+        kafka._save_request_bookings(self.app, REQUEST_ID, [OFFER_ID + 1, OFFER_ID + 2])
+        kafka._save_request_bookings(self.app, REQUEST_ID, [])
+        self.assertEqual([booking.offer_id for booking in LockerBooking.query.all()], [OFFER_ID + 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
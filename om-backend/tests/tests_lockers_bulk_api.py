@@ -0,0 +1,80 @@
+import unittest
+import json
+from types import SimpleNamespace
+from unittest import mock
+import project.web3
+from local_app import config, create_local_app, create_local_token
+from project.models import db
+from project.models.smartLocker import SmartLocker
+
+# Owner without lockers in the mock data.
+OWNER_ID = "user_5"
+OWNER_NAME = "User 5"
+MARKETPLACE_ADDRESS = "0x0000000000000000000000000000000000000001"
+
+
+def _locker(locker_id, name):
+    return {"id": locker_id, "name": name, "location": {"lat": 60.17, "lon": 24.94}, "icon_image": "https://locker.com", "lock_mechanism": "push-to-lock"}
+
+
+class BulkLockersAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_local_app()
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.token = create_local_token(OWNER_NAME)
+        # The lockers are registered for the marketplace smart contract of the chain the backend is connected to.
+        self.web3_patches = [mock.patch.object(project.web3, "marketplace_sc", SimpleNamespace(address=MARKETPLACE_ADDRESS)), mock.patch.object(project.web3, "eth_chain_id", 1)]
+        for web3_patch in self.web3_patches:
+            web3_patch.start()
+
+    def tearDown(self):
+        for web3_patch in self.web3_patches:
+            web3_patch.stop()
+        db.session.remove()
+        self.app_context.pop()
+
+    def _post_ndjson(self, body):
+        return self.client.post("/api/lockers:bulk", data=body, content_type="application/x-ndjson", headers={"Authorization": self.token})
+
+    def test_bulk_registration(self):
+        lockers = [_locker(100 + i, f"Bulk locker {i}") for i in range(3)]
+        response = self._post_ndjson("\n".join(json.dumps(locker) for locker in lockers) + "\nnot json\n" + json.dumps({"name": "No location"}))
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.data)["results"]
+        self.assertEqual([result["status"] for result in results], [201, 201, 201, 400, 400])
+        self.assertEqual([result["index"] for result in results], [0, 1, 2, 3, 4])
+        self.assertEqual([result["id"] for result in results[:3]], [100, 101, 102])
+        saved_lockers = SmartLocker.query.filter(SmartLocker.owner_id == OWNER_ID).order_by(SmartLocker.id).all()
+        self.assertEqual([(locker.id, locker.name, locker.chain_id, locker.marketplace_smart_contract_address) for locker in saved_lockers], [(100 + i, f"Bulk locker {i}", "1", MARKETPLACE_ADDRESS) for i in range(3)])
+
+    def test_bulk_registration_duplicates(self):
+        self.assertEqual(self._post_ndjson(json.dumps(_locker(100, "Bulk locker"))).status_code, 200)
+        # Same name, same ID, and same name within the request: the conflicts are reported for each record, and the new locker is still registered.
+        lockers = [_locker(101, "Bulk locker"), _locker(100, "Renamed bulk locker"), _locker(102, "New bulk locker"), _locker(103, "New bulk locker")]
+        response = self.client.post("/api/lockers:bulk", json=lockers, headers={"Authorization": self.token})
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.data)["results"]
+        self.assertEqual([result["status"] for result in results], [409, 409, 201, 409])
+        self.assertEqual(results[0]["message"], "Locker with the same name already existing")
+        self.assertEqual(results[1]["message"], "Locker with the same id already existing")
+        self.assertEqual(SmartLocker.query.filter(SmartLocker.owner_id == OWNER_ID).count(), 2)
+
+    def test_bulk_registration_too_many_lockers(self):
+        with mock.patch.object(config, "LOCKER_BULK_MAX_RECORDS", 5):
+            response = self._post_ndjson("\n".join(json.dumps(_locker(100 + i, f"Bulk locker {i}")) for i in range(6)))
+            self.assertEqual(response.status_code, 413)
+            response = self.client.post("/api/lockers:bulk", json=[_locker(100 + i, f"Bulk locker {i}") for i in range(6)], headers={"Authorization": self.token})
+            self.assertEqual(response.status_code, 413)
+        # Nothing is inserted.
+        self.assertEqual(SmartLocker.query.filter(SmartLocker.owner_id == OWNER_ID).count(), 0)
+
+    def test_bulk_registration_bad_requests(self):
+        self.assertEqual(self.client.post("/api/lockers:bulk", json={"lockers": []}, headers={"Authorization": self.token}).status_code, 400)
+        self.assertEqual(self.client.post("/api/lockers:bulk", json=[]).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
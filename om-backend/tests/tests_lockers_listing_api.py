@@ -0,0 +1,52 @@
+import unittest
+import json
+from local_app import create_local_app
+
+
+class LockersListingAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_local_app()
+        self.client = self.app.test_client()
+
+    def _get(self, url, **args):
+        response = self.client.get(url, query_string=args)
+        return response.status_code, json.loads(response.data)
+
+    def test_owner_lockers_pagination(self):
+        (status_code, page) = self._get("/api/owners/user_1/lockers", limit=1, fields="id,name")
+        self.assertEqual((status_code, page), (200, {"lockers": [{"locker": {"id": 1, "name": "Smart Locker 1"}}], "next": 1}))
+        (status_code, page) = self._get("/api/owners/user_1/lockers", limit=1, after=page["next"], fields="id,name")
+        self.assertEqual((status_code, page), (200, {"lockers": [{"locker": {"id": 2, "name": "Smart Locker 2"}}], "next": 2}))
+        # The last page is not full, hence there is no next page.
+        self.assertEqual(self._get("/api/owners/user_1/lockers", limit=1, after=page["next"]), (200, {"lockers": []}))
+        (status_code, page) = self._get("/api/owners/user_1/lockers")
+        self.assertEqual([locker["locker"]["id"] for locker in page["lockers"]], [1, 2])
+        self.assertNotIn("next", page)
+
+    def test_owner_details_fields(self):
+        self.assertEqual(self._get("/api/owners/user_1", fields="name,locker_ids"), (200, {"name": "User 1", "locker_ids": [1, 2]}))
+        self.assertEqual(self._get("/api/owners/user_5", fields="id,locker_ids"), (200, {"id": "user_5", "locker_ids": []}))
+        (status_code, owner) = self._get("/api/owners/user_1")
+        self.assertEqual(owner["locker_ids"], [1, 2])
+        self.assertEqual(owner["phone"], "(+358) 1111111111")
+
+    def test_locker_details_fields(self):
+        self.assertEqual(self._get("/api/lockers/1", fields="id,location"), (200, {"locker": {"id": 1, "location": {"additional_info": "1", "lat": 1.0, "lon": 1.0}}}))
+        (status_code, locker) = self._get("/api/lockers/1")
+        self.assertEqual(locker["marketplace"], {"chain_id": "666", "marketplace_smart_contract_address": "0x1231238712380e0i123i12031"})
+        self.assertEqual(locker["locker"]["additional_images"], ["https://locker_1_1.com", "https://locker_1_2.com", "https://locker_1_3.com"])
+
+    def test_listing_bad_parameters(self):
+        self.assertEqual(self.client.get("/api/owners/user_1/lockers", query_string={"limit": 0}).status_code, 400)
+        self.assertEqual(self.client.get("/api/owners/user_1/lockers", query_string={"after": "first"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/owners/user_1/lockers", query_string={"fields": "id,secret"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/owners/user_1", query_string={"fields": ""}).status_code, 400)
+        self.assertEqual(self.client.get("/api/lockers/1", query_string={"fields": "owner"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/owners/no_user/lockers").status_code, 404)
+        self.assertEqual(self.client.get("/api/owners/no_user").status_code, 404)
+        self.assertEqual(self.client.get("/api/lockers/999").status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import json
+from local_app import config, create_local_app
+from project import kafka
+from project.models import db
+from project.models.smartLocker import SmartLocker
+from project.models.marketplaceReq import MarketplaceRequest
+from project.models.marketplaceOff import MarketplaceOffer
+
+
+def _locker_ids(lockers):
+    return [locker["locker"]["id"] for locker in lockers]
+
+
+class LockersSearchAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_local_app()
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        # Lockers 1 to 4 of the mock data are at (1, 1) to (4, 4). Lockers 10 to 14 are added around (60.17, 24.94), about 100 m from each other.
+        db.session.add_all([SmartLocker(id=locker_id, name=f"Search locker {locker_id}", lat=60.17 + (locker_id - 10) * 0.0009, lon=24.94, icon_image="https://locker.com", lock_mechanism="push-to-lock", owner_id="user_5") for locker_id in range(14, 9, -1)])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def _search(self, **args):
+        response = self.client.get("/api/lockers", query_string=dict(args, fields="id"))
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.data)["lockers"]
+
+    def test_lockers_in_bounding_box(self):
+        self.assertEqual(_locker_ids(self._search(bbox="0.6,0.6,1.4,1.4")), [1])
+        self.assertEqual(_locker_ids(self._search(bbox="60.1,24.9,60.2,25")), [10, 11, 12, 13, 14])
+        # Sorted and limited by ID.
+        self.assertEqual(_locker_ids(self._search(bbox="60.1,24.9,60.2,25", limit=2)), [10, 11])
+        # The edges are included.
+        self.assertEqual(_locker_ids(self._search(bbox="1,1,1.5,1.5")), [1])
+        self.assertEqual(_locker_ids(self._search(bbox="0.5,0.5,1,1")), [1])
+        self.assertEqual(self._search(bbox="10,10,10.5,10.5"), [])
+
+    def test_lockers_near_point(self):
+        lockers = self._search(near="60.1718,24.94", radius=150)
+        # Sorted by distance: locker 12 is 0 m away, lockers 11 and 13 about 100 m away.
+        self.assertEqual(_locker_ids(lockers), [12, 11, 13])
+        self.assertEqual(lockers[0]["distance"], 0)
+        self.assertTrue(all(locker["distance"] <= 150 for locker in lockers))
+        self.assertEqual(_locker_ids(self._search(near="60.1718,24.94", radius=150, limit=1)), [12])
+        lockers = self._search(near="1.2,1.2", radius=50000)
+        # Locker 1 is about 31 km away, the other mock lockers more than 100 km away.
+        self.assertEqual(_locker_ids(lockers), [1])
+        self.assertTrue(31000 < lockers[0]["distance"] < 32000)
+
+    def test_location_bad_parameters(self):
+        max_radius = config.LOCKER_SEARCH_MAX_RADIUS
+        for args in [{}, {"near": "3,3"}, {"near": "3,3", "radius": max_radius + 1}, {"near": "3,3", "radius": 0}, {"near": "91,3", "radius": 10},
+                     {"bbox": "2.5,2.5,0.5,0.5"}, {"bbox": "0,0,1"}, {"bbox": "0,0,1,1", "near": "1,1", "radius": 10}, {"bbox": "0,0,1,1", "limit": 0}]:
+            self.assertEqual(self.client.get("/api/lockers", query_string=args).status_code, 400, args)
+
+    def test_bounding_box_size_limit(self):
+        # The bounding box can be at most twice the maximum radius high and wide: 100 km by default, i.e., about 0.9 degrees of latitude.
+        self.assertEqual(self.client.get("/api/lockers", query_string={"bbox": "-90,-180,90,180"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/lockers", query_string={"bbox": "1,1,2,1.5"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/lockers", query_string={"bbox": "1,1,1.5,2"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/lockers", query_string={"bbox": "1,1,1.8,1.8"}).status_code, 200)
+        # Degrees of longitude get shorter towards the poles.
+        self.assertEqual(self.client.get("/api/lockers", query_string={"bbox": "70,1,70.5,3"}).status_code, 200)
+
+
+class LockerAvailabilityAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_local_app()
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        # Locker 1 is booked for [1000, 2000) by the accepted offer of request 100, as when the request is decided.
+        db.session.add(MarketplaceRequest(id=100, start_time=1000, end_time=2000, auction_min_price_per_slot=1, locker_id=1, status="decided"))
+        db.session.add(MarketplaceOffer(id=200, request_id=100))
+        db.session.commit()
+        kafka._save_request_bookings(self.app, 100, [200])
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def _available(self, start_time, end_time, **args):
+        response = self.client.get("/api/lockers/availability", query_string=dict(args, fields="id", **{"from": start_time, "to": end_time}))
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.data)
+
+    def test_booked_locker_is_not_available(self):
+        self.assertEqual(_locker_ids(self._available(1500, 2500)["lockers"]), [2, 3, 4])
+        self.assertEqual(_locker_ids(self._available(0, 1001)["lockers"]), [2, 3, 4])
+        self.assertEqual(_locker_ids(self._available(1200, 1300)["lockers"]), [2, 3, 4])
+        # The interval is [from, to): adjacent bookings do not overlap.
+        self.assertEqual(_locker_ids(self._available(0, 1000)["lockers"]), [1, 2, 3, 4])
+        self.assertEqual(_locker_ids(self._available(2000, 3000)["lockers"]), [1, 2, 3, 4])
+
+    def test_available_lockers_pagination(self):
+        page = self._available(1500, 2500, limit=2)
+        self.assertEqual(page, {"lockers": [{"locker": {"id": 2}}, {"locker": {"id": 3}}], "next": 3})
+        self.assertEqual(self._available(1500, 2500, limit=2, after=page["next"]), {"lockers": [{"locker": {"id": 4}}]})
+
+    def test_available_lockers_by_location(self):
+        self.assertEqual(self._available(1500, 2500, bbox="0.6,0.6,1.4,1.4")["lockers"], [])
+        self.assertEqual(_locker_ids(self._available(0, 1000, bbox="0.6,0.6,1.4,1.4")["lockers"]), [1])
+        lockers = self._available(1500, 2500, near="2,2", radius=1000)["lockers"]
+        self.assertEqual(lockers, [{"locker": {"id": 2}, "distance": 0}])
+
+    def test_availability_bad_parameters(self):
+        for args in [{}, {"from": 1000}, {"from": 2000, "to": 1000}, {"from": 1000, "to": 1000}, {"from": "now", "to": 2000}, {"from": 1000, "to": 2000, "limit": 0}, {"from": 1000, "to": 2000, "bbox": "0,0,10,10"}]:
+            self.assertEqual(self.client.get("/api/lockers/availability", query_string=args).status_code, 400, args)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import json
+from local_app import create_local_app
+from project.models import db
+from project.models.marketplaceReq import MarketplaceRequest
+from project.models.marketplaceOff import MarketplaceOffer
+
+LOCKER_ID = 1
+
+
+class LockerRequestsAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_local_app()
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        # Requests 1 to 5 of locker 1, with 3 open. Request 1 has 2 auction offers and 1 instant rent offer.
+        statuses = ["open", "closed", "open", "decided", "open"]
+        db.session.add_all([MarketplaceRequest(id=request_id, start_time=1000, end_time=2000, auction_min_price_per_slot=1, locker_id=LOCKER_ID, status=status) for (request_id, status) in enumerate(statuses, start=1)])
+        db.session.add_all([MarketplaceOffer(id=offer_id, request_id=1, offer_type=offer_type) for (offer_id, offer_type) in [(10, 0), (11, 1), (12, 0)]])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def _get(self, url, **args):
+        response = self.client.get(url, query_string=args)
+        return response.status_code, json.loads(response.data)
+
+    def test_locker_requests_pagination(self):
+        self.assertEqual(self._get(f"/api/lockers/{LOCKER_ID}/requests"), (200, {"open": [1, 3, 5], "closed": [2], "decided": [4]}))
+        self.assertEqual(self._get(f"/api/lockers/{LOCKER_ID}/requests", limit=2), (200, {"open": [1], "closed": [2], "decided": []}))
+        self.assertEqual(self._get(f"/api/lockers/{LOCKER_ID}/requests", limit=2, after=2), (200, {"open": [3], "closed": [], "decided": [4]}))
+        self.assertEqual(self._get(f"/api/lockers/{LOCKER_ID}/requests", only_open="true", limit=2, after=1), (200, {"open": [3, 5], "closed": [], "decided": []}))
+
+    def test_request_offers_pagination(self):
+        self.assertEqual(self._get("/api/marketplace/requests/1/offers"), (200, [10, 11, 12]))
+        self.assertEqual(self._get("/api/marketplace/requests/1/offers", limit=1, after=10), (200, [11]))
+        self.assertEqual(self._get("/api/marketplace/requests/1/offers", auction_only="true"), (200, [10, 12]))
+        self.assertEqual(self._get("/api/marketplace/requests/2/offers"), (200, []))
+
+    def test_pagination_bad_parameters(self):
+        self.assertEqual(self.client.get(f"/api/lockers/{LOCKER_ID}/requests", query_string={"limit": 0}).status_code, 400)
+        self.assertEqual(self.client.get(f"/api/lockers/{LOCKER_ID}/requests", query_string={"limit": 1001}).status_code, 400)
+        self.assertEqual(self.client.get("/api/marketplace/requests/1/offers", query_string={"after": "first"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/lockers/999/requests").status_code, 404)
+        self.assertEqual(self.client.get("/api/marketplace/requests/999/offers").status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
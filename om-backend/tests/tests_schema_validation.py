@@ -0,0 +1,79 @@
+import sys
+sys.path.append('../')
+
+import json
+import urllib.parse
+import uuid
+from unittest import mock
+import requests
+import project
+from project.config import BaseConfig
+from project.schema_validation import SchemaValidationClient
+
+config = BaseConfig()
+project.app_config = config
+# SR COMPONENT
+SR_SCHEMA_URL = urllib.parse.urljoin(config.SR_ENDPOINT_URL, "api/schema")
+SR_SCHEMAS_URL = urllib.parse.urljoin(config.SR_ENDPOINT_URL, "api/schemas")
+SCHEMA_NAME = "SMAUG schema validation test " + uuid.uuid4().hex
+
+
+def _test_schema(maximum_price):
+    return {"type": "object", "properties": {"price": {"type": "integer", "minimum": 0, "maximum": maximum_price}}, "required": ["price"]}
+
+
+def _remove_test_schema():
+    schemas = json.loads(requests.get(SR_SCHEMAS_URL).content)
+    for schema_id, name in schemas.items():
+        if name == SCHEMA_NAME:
+            requests.delete(SR_SCHEMA_URL + "/" + schema_id)
+
+
+def test_schema_revalidation():
+    response = requests.post(SR_SCHEMA_URL, json={"name": SCHEMA_NAME, "schema": _test_schema(50)})
+    assert response.status_code == 201
+    try:
+        client = SchemaValidationClient(config.SR_ENDPOINT_URL, SCHEMA_NAME, config.SR_SCHEMA_PATH, 0)
+        # The schema is resolved by name and fetched from the SR component
+        assert client.validate({"price": 40}) == (True, None)
+        etag = client._etag
+        assert etag is not None
+        # Not changed: the SR component answers 304 and the cached schema is kept
+        assert client.validate({"price": 40}) == (True, None)
+        assert client._etag == etag
+        # Changed: the new schema is fetched with its new ETag
+        response = requests.put(SR_SCHEMA_URL, json={"name": SCHEMA_NAME, "schema": _test_schema(30)})
+        assert response.status_code == 201
+        valid, error = client.validate({"price": 40})
+        assert not valid
+        assert "30" in error
+        assert client._etag != etag
+    finally:
+        _remove_test_schema()
+
+
+def _response(status_code, body):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    return response
+
+
+class _FailingSR(object):
+    # Answers every request with the given response, as an SR component failing behind a proxy.
+    def __init__(self, response):
+        self.response = response
+
+    def request(self, method, url, timeout, **kwargs):
+        return self.response
+
+
+def test_remote_validation_server_error():
+    for failed_response in [_response(500, b"<html>Internal Server Error</html>"), _response(502, b""), _response(400, b"Bad Request")]:
+        client = SchemaValidationClient(config.SR_ENDPOINT_URL, SCHEMA_NAME, config.SR_SCHEMA_PATH, 0)
+        client._use_remote_validation = True         # As if the schema in the SR component could not be compiled locally
+        with mock.patch("project.authorization_server.get_http_client", return_value=_FailingSR(failed_response)):
+            # The local validator takes over.
+            valid, error = client.validate({})
+        assert not valid
+        assert "is a required property" in error
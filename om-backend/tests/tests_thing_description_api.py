@@ -0,0 +1,39 @@
+import unittest
+from local_app import create_local_app
+from project.models import db
+from project.models.smartLocker import SmartLocker
+
+LOCKER_ID = 1
+
+
+class ThingDescriptionAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_local_app()
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def test_get_thing_description(self):
+        response = self.client.get(f"/api/td/{LOCKER_ID}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content_type, "application/ld+json")
+        etag = response.headers["ETag"]
+        response = self.client.get(f"/api/td/{LOCKER_ID}", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get("/api/td/999").status_code, 404)
+
+    def test_deleted_locker_with_cached_thing_description(self):
+        self.assertEqual(self.client.get(f"/api/td/{LOCKER_ID}").status_code, 200)
+        # Deleted as by another worker process, whose TD cache is not the one of this process.
+        SmartLocker.query.filter(SmartLocker.id == LOCKER_ID).delete()
+        db.session.commit()
+        self.assertEqual(self.client.get(f"/api/td/{LOCKER_ID}").status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import time
+from local_app import create_local_app, create_local_token
+from project.token_verification import TokenValidationCache
+
+OWNER_NAME = "User 1"
+
+
+class TokenRevocationAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_local_app()
+        self.client = self.app.test_client()
+        self.token = create_local_token(OWNER_NAME)
+
+    def _test_route_status(self, token):
+        return self.client.post("/api/test_route", headers={"Authorization": token}).status_code
+
+    def test_revoke_token(self):
+        # Accepted, and cached as valid.
+        self.assertEqual(self._test_route_status(self.token), 200)
+        self.assertEqual(self.client.post("/api/revoke_token", headers={"Authorization": self.token}).status_code, 200)
+        self.assertEqual(self._test_route_status(self.token), 403)
+        self.assertEqual(self.client.post("/api/revoke_token", headers={"Authorization": self.token}).status_code, 403)
+        # Other tokens of the same owner are still accepted.
+        self.assertEqual(self._test_route_status(create_local_token(OWNER_NAME)), 200)
+
+    def test_revoke_requires_valid_token(self):
+        self.assertEqual(self.client.post("/api/revoke_token").status_code, 400)
+        self.assertEqual(self.client.post("/api/revoke_token", headers={"Authorization": self.token + "x"}).status_code, 403)
+        self.assertEqual(self._test_route_status(self.token), 200)
+
+
+class TokenValidationCacheRevocations(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = TokenValidationCache(10, 30, 3)
+
+    def test_revocations_are_bounded(self):
+        for i in range(5):
+            self.cache.revoke(f"token {i}")
+        # The oldest revocations are forgotten.
+        self.assertEqual([self.cache.is_revoked(f"token {i}") for i in range(5)], [False, False, True, True, True])
+        for i in range(20):
+            self.cache.revoke(f"expiring token {i}", time.time() + 100)
+        self.assertEqual(len(self.cache._revoked), 3)
+        self.assertLessEqual(len(self.cache._revoked_expirations), 6)
+        self.assertTrue(self.cache.is_revoked("expiring token 19"))
+
+    def test_expired_token_is_not_kept(self):
+        self.cache.revoke("expired token", time.time() - 1)
+        self.assertFalse(self.cache.is_revoked("expired token"))
+        self.assertEqual(len(self.cache._revoked), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
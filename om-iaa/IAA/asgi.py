@@ -0,0 +1,155 @@
+try:
+    import httpx
+except ImportError:
+     print("Couldn't import httpx, if you don't need the ASGI serving mode that's OK")
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+# Headers that only apply to a single connection, and are never forwarded
+_HOP_BY_HOP_HEADERS = {b'connection', b'keep-alive', b'proxy-authenticate', b'proxy-authorization', b'te', b'trailers', b'transfer-encoding', b'upgrade'}
+# The Authorization header is consumed by the IAA, and only sent upstream if set with header_rewrite
+_REQUEST_HEADERS_NOT_FORWARDED = _HOP_BY_HOP_HEADERS | {b'host', b'authorization'}
+
+class IAAASGIHandler():
+    '''
+    ASGI version of IAAHandler, with the same configuration, routing and decisions. Token
+    verification and ERC-721 lookups run in a thread pool, so the event loop is never blocked,
+    and authorized requests are proxied with non-blocking streams.
+    '''
+    def __init__(self, handler, pep_threads=32):
+        self.handler = handler
+        self.executor = ThreadPoolExecutor(max_workers=pep_threads)
+        proxy_conf = handler.active.conf.get('proxy', {})
+        self.http_proxy = async_http_proxy(proxy_conf.get('connect_timeout', 5), proxy_conf.get('read_timeout', 30), proxy_conf.get('pool_size', 10))
+
+    async def __call__(self, scope, receive, send):
+        if (scope['type'] == 'lifespan'):
+            await self._lifespan(receive, send)
+            return
+        if (scope['type'] != 'http'):
+            return
+        # The configuration may be reloaded while the request is served, it is read once
+        active = self.handler.active
+        path = scope['path']
+        if (path == active.metrics_path):
+            await _send_response(send, 200, json.dumps(self.handler.metrics()).encode())
+            return
+        loop = asyncio.get_event_loop()
+        auth = None
+        for key, value in scope['headers']:
+            if (key == b'authorization'):
+                auth = value.decode('latin-1')
+        if (path == active.batch_path and scope['method'] == 'POST'):
+            is_client_authorized, error_code = await loop.run_in_executor(self.executor, self.handler.authorize_batch, active, auth)
+            if (not is_client_authorized):
+                await _send_response(send, 401, str(error_code).encode())
+                return
+            max_body_size = active.batch_max_body_size
+            data = await _read_request_body(scope, receive, max_body_size)
+            if (data is None):
+                await _send_response(send, 413, json.dumps({'error': 'The body must be at most ' + str(max_body_size) + ' bytes'}).encode())
+                return
+            try:
+                body = json.loads(data)
+            except ValueError:
+                body = None
+            code, output = await loop.run_in_executor(self.executor, self.handler.verify_batch, active, body)
+            await _send_response(send, code, json.dumps(output).encode())
+            return
+        resource = active.router.route(path)
+        is_client_authorized, error_code = await loop.run_in_executor(self.executor, self.handler.authorize, resource, auth)
+        if (is_client_authorized):
+            if ('proxy' in resource):
+                await self.http_proxy.forward(scope, receive, send, resource['proxy']['proxy_pass'], resource['proxy'].get('header_rewrite'),
+                    resource['proxy'].get('connect_timeout'), resource['proxy'].get('read_timeout'))
+            else:
+                await _send_response(send, 200, b'OK')
+        else:
+            await _send_response(send, 401, str(error_code).encode())
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if (message['type'] == 'lifespan.startup'):
+                await send({'type': 'lifespan.startup.complete'})
+            elif (message['type'] == 'lifespan.shutdown'):
+                await self.http_proxy.close()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+class async_http_proxy:
+    '''Non-blocking version of http_proxy: one pooled client per upstream, bodies streamed in both directions'''
+    def __init__(self, connect_timeout=5, read_timeout=30, pool_size=10):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_size = pool_size
+        self._clients = {}
+
+    async def forward(self, scope, receive, send, target, header_rewrite = None, connect_timeout = None, read_timeout = None):
+        url = target + scope['path']
+        if (scope.get('query_string')):
+            url += '?' + scope['query_string'].decode('latin-1')
+        headers = [(key, value) for key, value in scope['headers'] if key.lower() not in _REQUEST_HEADERS_NOT_FORWARDED]
+        if (header_rewrite):
+            rewritten = {key.lower().encode('latin-1') for key in header_rewrite}
+            headers = [(key, value) for key, value in headers if key.lower() not in rewritten]
+            headers += [(key.encode('latin-1'), value.encode('latin-1')) for key, value in header_rewrite.items()]
+        timeout = httpx.Timeout(read_timeout or self.read_timeout, connect=connect_timeout or self.connect_timeout)
+        client = self._client(target)
+        has_body = any(key.lower() in (b'content-length', b'transfer-encoding') for key, _ in scope['headers'])
+        request = client.build_request(scope['method'], url, headers=headers, content=_request_body(receive) if has_body else None, timeout=timeout)
+        try:
+            upstream = await client.send(request, stream=True)
+        except httpx.TimeoutException:
+            await _send_response(send, 504, b'Upstream timeout', 'text/plain')
+            return
+        except httpx.HTTPError:
+            await _send_response(send, 502, b'Upstream not reachable', 'text/plain')
+            return
+        try:
+            response_headers = [(key, value) for key, value in upstream.headers.raw if key.lower() not in _HOP_BY_HOP_HEADERS]
+            await send({'type': 'http.response.start', 'status': upstream.status_code, 'headers': response_headers})
+            async for chunk in upstream.aiter_raw():
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            await upstream.aclose()
+
+    async def close(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients = {}
+
+    def _client(self, target):
+        client = self._clients.get(target)
+        if client is None:
+            client = httpx.AsyncClient(limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size))
+            self._clients[target] = client
+        return client
+
+async def _request_body(receive):
+    more_body = True
+    while more_body:
+        message = await receive()
+        if (message['type'] == 'http.disconnect'):
+            return
+        yield message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+async def _read_request_body(scope, receive, max_size):
+    '''Returns the request body, or None as soon as it is known to be longer than max_size bytes'''
+    for key, value in scope['headers']:
+        if (key.lower() == b'content-length' and value.isdigit() and int(value) > max_size):
+            return None
+    body = bytearray()
+    async for chunk in _request_body(receive):
+        body += chunk
+        if (len(body) > max_size):
+            return None
+    return bytes(body)
+
+async def _send_response(send, status, body, content_type = 'application/json'):
+    await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', content_type.encode()), (b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,46 @@
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+class conf_watcher:
+    '''
+    Polls the modification time and size of configuration files every `interval` seconds, and
+    calls on_change with the list of changed files. The files to watch are given by get_paths,
+    so that files referenced by the configuration (e.g., signing keys) are followed as well.
+    '''
+    def __init__(self, get_paths, on_change, interval=2):
+        self.get_paths = get_paths
+        self.on_change = on_change
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._versions = self._read_versions()
+        threading.Thread(target=self._watch, daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval):
+            versions = self._read_versions()
+            changed = [path for path in set(versions) | set(self._versions) if versions.get(path) != self._versions.get(path)]
+            self._versions = versions
+            if (changed):
+                try:
+                    self.on_change(sorted(changed))
+                except Exception as e:
+                    logger.exception("Couldn't reload the configuration")
+                # Files referenced by the new configuration are only known once it is loaded
+                for path, version in self._read_versions().items():
+                    self._versions.setdefault(path, version)
+
+    def _read_versions(self):
+        versions = {}
+        for path in self.get_paths():
+            try:
+                stat = os.stat(path)
+                versions[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                versions[path] = None
+        return versions
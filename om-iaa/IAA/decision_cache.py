@@ -0,0 +1,167 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+class decision_cache:
+    '''
+    Bounded LRU cache of authorization decisions, keyed by the token hash and the policy
+    that evaluated it. Each entry holds the (result, error code) pair and expires at the given
+    time, or after max_ttl seconds if earlier. A size of 0 disables the cache.
+    '''
+    def __init__(self, size=0, max_ttl=0):
+        self.size = size
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token, policy_id):
+        if self.size <= 0:
+            return None
+        key = self._key(token, policy_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token, policy_id, decision, expires_at=None):
+        if self.size <= 0:
+            return
+        now = time.time()
+        expires_at = min(expires_at, now + self.max_ttl) if expires_at is not None else now + self.max_ttl
+        if expires_at <= now:
+            return
+        key = self._key(token, policy_id)
+        with self._lock:
+            self._entries[key] = (decision, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups > 0 else 0.0
+            }
+
+    def _key(self, token, policy_id):
+        return (hashlib.sha256(token.encode()).digest(), policy_id)
+
+
+class shared_decision_cache:
+    '''
+    Version of decision_cache shared by the worker processes of a host, stored in a memory-mapped
+    file (e.g., under /dev/shm). Entries live in buckets of WAYS slots, each locked with a record
+    lock while it is read or written; when a bucket is full, the entry that expires first is evicted.
+    Hit and miss counts are per process.
+    '''
+    WAYS = 4
+    # Key hash, expiration time, result, error code
+    SLOT = struct.Struct('<32sd?h5x')
+
+    def __init__(self, path, size=0, max_ttl=0):
+        self.size = size
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+        self._buckets = max((size + self.WAYS - 1) // self.WAYS, 1)
+        self._bucket_size = self.WAYS * self.SLOT.size
+        self._lock = threading.Lock()    # Record locks do not exclude the threads of a process
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        length = self._buckets * self._bucket_size
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            current_length = os.fstat(self._fd).st_size
+            if current_length == 0:
+                os.ftruncate(self._fd, length)
+            elif current_length != length:
+                raise ValueError(path + " was created for another cache size, it must be removed first")
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, length)
+
+    def get(self, token, policy_id):
+        if self.size <= 0:
+            return None
+        key = self._key(token, policy_id)
+        with self._bucket(key) as offset:
+            for slot in range(self.WAYS):
+                entry_key, expires_at, result, error_code = self.SLOT.unpack_from(self._map, offset + slot * self.SLOT.size)
+                if entry_key == key and expires_at > time.time():
+                    self.hits += 1
+                    return result, error_code
+            self.misses += 1
+        return None
+
+    def put(self, token, policy_id, decision, expires_at=None):
+        if self.size <= 0:
+            return
+        now = time.time()
+        expires_at = min(expires_at, now + self.max_ttl) if expires_at is not None else now + self.max_ttl
+        if expires_at <= now:
+            return
+        key = self._key(token, policy_id)
+        with self._bucket(key) as offset:
+            victim, victim_expires_at = 0, None
+            for slot in range(self.WAYS):
+                entry_key, entry_expires_at, _, _ = self.SLOT.unpack_from(self._map, offset + slot * self.SLOT.size)
+                if entry_key == key:
+                    victim = slot
+                    break
+                if victim_expires_at is None or entry_expires_at < victim_expires_at:
+                    victim, victim_expires_at = slot, entry_expires_at
+            self.SLOT.pack_into(self._map, offset + victim * self.SLOT.size, key, expires_at, decision[0], decision[1])
+
+    def stats(self):
+        now = time.time()
+        size = 0
+        for offset in range(0, len(self._map), self.SLOT.size):
+            if struct.unpack_from('<d', self._map, offset + 32)[0] > now:
+                size += 1
+        lookups = self.hits + self.misses
+        return {
+            'size': size,
+            'max_size': self._buckets * self.WAYS,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups > 0 else 0.0,
+            'shared': True
+        }
+
+    def _key(self, token, policy_id):
+        return hashlib.sha256(token.encode() + b'\0' + policy_id.encode()).digest()
+
+    def _bucket(self, key):
+        return _locked_bucket(self, int.from_bytes(key[:8], 'little') % self._buckets)
+
+class _locked_bucket:
+    def __init__(self, cache, bucket):
+        self.cache = cache
+        self.offset = bucket * cache._bucket_size
+
+    def __enter__(self):
+        self.cache._lock.acquire()
+        fcntl.lockf(self.cache._fd, fcntl.LOCK_EX, self.cache._bucket_size, self.offset)
+        return self.offset
+
+    def __exit__(self, *exc):
+        fcntl.lockf(self.cache._fd, fcntl.LOCK_UN, self.cache._bucket_size, self.offset)
+        self.cache._lock.release()
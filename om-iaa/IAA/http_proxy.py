@@ -1,25 +1,76 @@
 from werkzeug.wrappers import Request, Response
-from werkzeug.datastructures import Headers
 import requests
+import threading
+
+# Headers that only apply to a single connection, and are never forwarded
+_HOP_BY_HOP_HEADERS = {'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te', 'trailers', 'transfer-encoding', 'upgrade'}
+# The Authorization header is consumed by the IAA, and only sent upstream if set with header_rewrite
+_REQUEST_HEADERS_NOT_FORWARDED = _HOP_BY_HOP_HEADERS | {'host', 'authorization', 'content-length'}
 
 class http_proxy:
-    def forward(self, environ, target, header_rewrite = None):
-        path    = environ.get('PATH_INFO')
+    '''
+    Reverse proxy for the protected resources. Each upstream has its own pool of keep-alive
+    connections, and request and response bodies are streamed in chunks, as they are.
+    '''
+    def __init__(self, connect_timeout=5, read_timeout=30, pool_size=10, chunk_size=65536):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_size = pool_size
+        self.chunk_size = chunk_size
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def forward(self, environ, target, header_rewrite = None, connect_timeout = None, read_timeout = None):
         req     = Request(environ)
-        accept  = req.headers.get('Accept')
-        content = req.headers.get('Content-Type')
-        headers = {}
-        if(accept):
-            headers['Accept'] = accept
-        if(content):
-            headers['Content-Type'] = content
+        url     = target + environ.get('PATH_INFO', '')
+        if (environ.get('QUERY_STRING')):
+            url += '?' + environ['QUERY_STRING']
+        headers = {key: value for key, value in req.headers.items() if key.lower() not in _REQUEST_HEADERS_NOT_FORWARDED}
         if(header_rewrite):
             headers.update(header_rewrite)
-        if (req.method == "GET"):
-            response  = requests.get(target + path, headers = headers)
-        elif (req.method == "PUT"): 
-            put_data = req.data
-            response  = requests.put(target + path, headers = headers, data = put_data.decode())
-        code = response.status_code
-        output = response.text
-        return code, output
\ No newline at end of file
+        timeout = (connect_timeout or self.connect_timeout, read_timeout or self.read_timeout)
+        try:
+            upstream = self._session(target).request(req.method, url, headers = headers, data = self._request_body(req, environ),
+                stream = True, timeout = timeout, allow_redirects = False)
+        except requests.exceptions.Timeout:
+            return Response(b'Upstream timeout', status=504)
+        except requests.exceptions.RequestException:
+            return Response(b'Upstream not reachable', status=502)
+        response_headers = [(key, value) for key, value in upstream.raw.headers.items() if key.lower() not in _HOP_BY_HOP_HEADERS]
+        response = Response(upstream.raw.stream(self.chunk_size, decode_content=False), status=upstream.status_code, headers=response_headers, direct_passthrough=True)
+        response.call_on_close(upstream.close)
+        return response
+
+    def _session(self, target):
+        with self._lock:
+            session = self._sessions.get(target)
+            if session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[target] = session
+            return session
+
+    def _request_body(self, req, environ):
+        if (req.content_length):
+            return _request_body(req.stream, req.content_length, self.chunk_size)
+        if (environ.get('wsgi.input_terminated')):
+            return iter(lambda: req.stream.read(self.chunk_size), b'')  # Unknown length: sent chunked
+        return None
+
+class _request_body:
+    '''File-like view of the incoming body with a known length, so that it is streamed with its Content-Length'''
+    def __init__(self, stream, length, chunk_size):
+        self.stream = stream
+        self.length = length
+        self.chunk_size = chunk_size
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return iter(lambda: self.stream.read(self.chunk_size), b'')
+
+    def read(self, size=-1):
+        return self.stream.read(size)
@@ -4,36 +4,76 @@ from jwt_pep                 import jwt_pep
 from jwt_erc721_pep          import jwt_erc721_pep
 from w3c_vc_pep              import w3c_vc_pep
 from http_proxy              import http_proxy
+from policy                  import compile_policies
+from conf_watcher            import conf_watcher
 
 import json
+import logging
+import os
 import sys
 import asyncio
 import requests
 import base64
+import functools
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# The configuration in use, its compiled policies and the settings read by every request. It is replaced
+# as a whole when the configuration is reloaded, and each request reads it once
+active_conf = namedtuple('active_conf', ['conf', 'router', 'metrics_path', 'batch_path', 'batch_max_size', 'batch_max_body_size'])
+
+def compile_conf(conf):
+    batch_conf = conf.get('batch', {})
+    return active_conf(conf, compile_policies(conf), conf.get('metrics_path', '/_iaa/metrics'), batch_conf.get('path', '/verify:batch'),
+        batch_conf.get('max_size', 100), batch_conf.get('max_body_size', 1048576))
 
-  
 
 class IAAHandler():
     def __init__(self):
-        with open('conf/iaa.conf') as f:
-            self.conf = json.load(f)
-        self.jwt_pep = jwt_pep()
+        self.load_conf()
+        conf = self.active.conf
+        cache_conf = conf.get('jwt_cache', {})
+        self.jwt_pep = jwt_pep(cache_conf.get('size', 10000), cache_conf.get('max_ttl', 300), cache_conf.get('shared_path'))
         self.jwt_erc721_pep = jwt_erc721_pep()
-        self.w3c_vc_pep = w3c_vc_pep()
-        self.http_proxy = http_proxy()
+        vc_conf = conf.get('w3c_vc', {})
+        self.w3c_vc_pep = w3c_vc_pep(vc_conf.get('contexts_dir', 'conf/contexts'), vc_conf.get('allow_remote_contexts', False), vc_conf.get('contexts', []), vc_conf.get('nquads_cache_size', 1000))
+        proxy_conf = conf.get('proxy', {})
+        self.http_proxy = http_proxy(proxy_conf.get('connect_timeout', 5), proxy_conf.get('read_timeout', 30), proxy_conf.get('pool_size', 10))
+        self.batch_executor = ThreadPoolExecutor(max_workers=conf.get('batch', {}).get('threads', 8))
+        # The configuration files are watched every reload_interval seconds, 0 disables it
+        reload_interval = conf.get('reload_interval', 2)
+        self.conf_watcher = conf_watcher(self._watched_files, self.reload_conf, reload_interval) if reload_interval > 0 else None
 
-    def wsgi_app(self, environ, start_response):
-        req      = Request(environ)
-        path     = environ.get('PATH_INFO')
-        code     = 403
-        resource = {}
-        output = 'Invalide or missing input parameters'
-        output_header = {}
-        auth    = req.headers.get('Authorization')
-        if (path in self.conf['resources']):
-            resource = self.conf['resources'][path]
-        elif ('default' in self.conf['resources']):
-            resource = self.conf['resources']["default"]
+    # Policies are compiled before being swapped in, with a single assignment, so requests never see a partially loaded configuration
+    def load_conf(self):
+        with open('conf/iaa.conf') as f:
+            self.active = compile_conf(json.load(f))
+
+    def _watched_files(self):
+        return ['conf/iaa.conf', 'conf/erc721.conf'] + self.active.router.key_files
+
+    # Called when configuration files change. If the new configuration is invalid, the current one is kept.
+    # Decisions cached for unchanged policies remain valid, as they are cached per policy hash
+    def reload_conf(self, changed_files):
+        if ('conf/erc721.conf' in changed_files):
+            previous_pep = self.jwt_erc721_pep
+            self.jwt_erc721_pep = jwt_erc721_pep()
+            previous_pep.close()
+        if (set(changed_files) - {'conf/erc721.conf'}):
+            try:
+                self.load_conf()
+            except (OSError, KeyError, ValueError) as e:
+                logger.error("Invalid configuration, keeping the current one: %s", e)
+                return
+        logger.info("Configuration reloaded: %s", ", ".join(changed_files))
+
+    def metrics(self):
+        return {'jwt_cache': self.jwt_pep.cache.stats()}
+
+    # Returns whether the client is authorized to access the resource, and the error code if not
+    def authorize(self, resource, auth):
         is_client_authorized = False
         error_code = 0
         if ('authorization' in resource and auth):
@@ -55,9 +95,6 @@ class IAAHandler():
             '''
             #*********W3C-VC***********
             if (resource['authorization']['type'] == "w3c-vc" and auth_type == "Bearer-W3C-VC"):
-                if ('signing_key' not in resource['authorization']):
-                    with open(resource['authorization']['signing_key_file'], mode='rb') as file: 
-                        resource['authorization']['signing_key'] = file.read()
                 result, error_code = self.w3c_vc_pep.verify_w3c_vc(vc=base64.urlsafe_b64decode(auth_grant).decode(), 
                     signing_key  = resource['authorization']['signing_key'],  
                     filter= resource['authorization']['filters'])
@@ -66,29 +103,82 @@ class IAAHandler():
 
             #*********JWT***********
             if (resource['authorization']['type'] == "jwt" and auth_type == "Bearer"):
-                if ('signing_key' not in resource['authorization']):
-                    with open(resource['authorization']['signing_key_file'], mode='rb') as file: 
-                        resource['authorization']['signing_key'] = file.read()
                 result, error_code = self.jwt_pep.verify_bearer(token=auth_grant, 
                     signing_key  = resource['authorization']['signing_key'], 
                     tokens_expire = resource['authorization']['tokens_expire'], 
-                    filter= resource['authorization']['filters'])
+                    filter= resource['authorization']['filters'],
+                    policy_id = resource['authorization']['policy_id'])
                 if (result == True):
                     is_client_authorized = True
 
             #*********JWT+ERC721*********** 
             if (resource['authorization']['type'] == "jwt-erc721" and auth_type == "Bearer-ERC721"):
-                if ('signing_key' not in resource['authorization']):
-                    with open(resource['authorization']['signing_key_file'], mode='rb') as file: 
-                        resource['authorization']['signing_key'] = file.read()
                 result, error_code = self.jwt_erc721_pep.verify_bearer_erc721(auth_grant, resource['authorization']['signing_key'])
                 if (result == True):
                     is_client_authorized = True
         elif('authorization' not in resource):
             is_client_authorized = True
+        return is_client_authorized, error_code
+
+    # The batch endpoint is served only if its path has an authorization policy in resources, and to the clients it authorizes
+    def authorize_batch(self, active, auth):
+        resource = active.router.route(active.batch_path)
+        if ('authorization' not in resource):
+            return False, 0
+        return self.authorize(resource, auth)
+
+    # Decides on many (resource, Authorization header) pairs at once, concurrently. Returns the status code and the response body
+    def verify_batch(self, active, body):
+        items = body.get('items') if isinstance(body, dict) else None
+        if (not isinstance(items, list) or len(items) > active.batch_max_size):
+            return 400, {'error': 'The body must contain a list of at most ' + str(active.batch_max_size) + ' items'}
+        return 200, {'results': list(self.batch_executor.map(functools.partial(self._verify_batch_item, active.router), items))}
+
+    def _verify_batch_item(self, router, item):
+        if (not isinstance(item, dict) or not isinstance(item.get('resource'), str) or not isinstance(item.get('authorization', ''), str)):
+            return {'authorized': False, 'error_code': 0, 'error': 'Invalide or missing input parameters'}
+        try:
+            is_client_authorized, error_code = self.authorize(router.route(item['resource']), item.get('authorization'))
+        except Exception:
+            is_client_authorized, error_code = False, 0
+        return {'authorized': is_client_authorized, 'error_code': error_code}
+
+    def wsgi_app(self, environ, start_response):
+        active   = self.active
+        req      = Request(environ)
+        path     = environ.get('PATH_INFO')
+        code     = 403
+        output = 'Invalide or missing input parameters'
+        output_header = {}
+        auth    = req.headers.get('Authorization')
+        if (path == active.metrics_path):
+            response = Response(json.dumps(self.metrics()), status=200, mimetype='application/json')
+            return response(environ, start_response)
+        if (path == active.batch_path and req.method == 'POST'):
+            is_client_authorized, error_code = self.authorize_batch(active, auth)
+            max_body_size = active.batch_max_body_size
+            if (not is_client_authorized):
+                code, output = 401, error_code
+            else:
+                # The body is not read past max_body_size bytes
+                data = req.stream.read(max_body_size + 1) if (req.content_length or 0) <= max_body_size else None
+                if (data is None or len(data) > max_body_size):
+                    code, output = 413, {'error': 'The body must be at most ' + str(max_body_size) + ' bytes'}
+                else:
+                    try:
+                        body = json.loads(data)
+                    except ValueError:
+                        body = None
+                    code, output = self.verify_batch(active, body)
+            response = Response(json.dumps(output), status=code, mimetype='application/json')
+            return response(environ, start_response)
+        resource = active.router.route(path)
+        is_client_authorized, error_code = self.authorize(resource, auth)
         if (is_client_authorized):
             if ('proxy' in  resource):
-                code, output = self.http_proxy.forward(environ, resource['proxy']['proxy_pass'], resource['proxy'].get('header_rewrite'))
+                response = self.http_proxy.forward(environ, resource['proxy']['proxy_pass'], resource['proxy'].get('header_rewrite'),
+                    resource['proxy'].get('connect_timeout'), resource['proxy'].get('read_timeout'))
+                return response(environ, start_response)
             else:
                 code = 200
                 output = "OK"
@@ -104,11 +194,24 @@ class IAAHandler():
     def __call__(self, environ, start_response):
         return self.wsgi_app(environ, start_response)
 
-def create_app():
+def create_app(asgi=False):
     app = IAAHandler()
+    if (asgi):
+        from asgi import IAAASGIHandler
+        return IAAASGIHandler(app, app.active.conf.get('asgi', {}).get('pep_threads', 32))
     return app
 
+def create_asgi_app():
+    return create_app(asgi=True)
+
 def main(): 
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    # IAA_SERVER_MODE=asgi serves the ASGI app with uvicorn, with IAA_WORKERS processes
+    if (os.environ.get('IAA_SERVER_MODE', 'wsgi') == 'asgi'):
+        import uvicorn
+        uvicorn.run('iaa:create_asgi_app', factory=True, host='', port=9000, workers=int(os.environ.get('IAA_WORKERS', 1)),
+            app_dir=os.path.dirname(os.path.abspath(__file__)))
+        return
     from werkzeug.serving import run_simple
     app = create_app()
     run_simple('', 9000, app)
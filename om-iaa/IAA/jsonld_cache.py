@@ -0,0 +1,127 @@
+try:
+    from pyld import jsonld
+except ImportError:
+     print("Couldn't import pyld, if you don't need W3C-VC support that's OK")
+import argparse
+import datetime
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+class context_cache:
+    '''
+    Offline JSON-LD document loader. Context documents are stored in a directory, one file per
+    version named after its SHA-256, and index.json maps each URL to its current version. All of
+    them are loaded in memory at startup. Missing contexts in `preload` are fetched at startup if
+    allow_remote is true; documents that are not cached are never fetched while verifying, and
+    cached ones are only replaced explicitly (see main).
+    '''
+    def __init__(self, directory, allow_remote=False, preload=()):
+        self.directory = directory
+        self.allow_remote = allow_remote
+        self.documents = {}
+        self._index_path = os.path.join(directory, 'index.json')
+        self._index = {}
+        if os.path.exists(self._index_path):
+            with open(self._index_path) as f:
+                self._index = json.load(f)
+        for url, entry in self._index.items():
+            with open(os.path.join(directory, entry['file'])) as f:
+                self.documents[url] = json.load(f)
+        for url in preload:
+            if url not in self.documents:
+                if not allow_remote:
+                    logger.warning("JSON-LD context %s is not cached, and remote contexts are not allowed", url)
+                    continue
+                try:
+                    self.fetch(url)
+                except Exception as e:
+                    logger.error("Couldn't fetch JSON-LD context %s: %s", url, e)
+
+    # pyld document loader
+    def load_document(self, url, options=None):
+        document = self.documents.get(url)
+        if document is None:
+            raise jsonld.JsonLdError('JSON-LD context not cached.', 'jsonld.LoadDocumentError', {'url': url}, code='loading document failed')
+        return {'contextUrl': None, 'documentUrl': url, 'document': document}
+
+    # Fetches the current version of the context, stores it in the cache directory and returns it
+    def fetch(self, url):
+        return self.store(url, jsonld.requests_document_loader()(url, {})['document'])
+
+    # Stores the given version of the context in the cache directory, as the current one, and returns it
+    def store(self, url, document):
+        content = json.dumps(document, sort_keys=True, indent=2).encode('utf-8')
+        digest = hashlib.sha256(content).hexdigest()
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, digest + '.jsonld'), 'wb') as f:
+            f.write(content)
+        self._index[url] = {'file': digest + '.jsonld', 'sha256': digest, 'fetched': datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')}
+        with open(self._index_path + '.tmp', 'w') as f:
+            json.dump(self._index, f, indent=2, sort_keys=True)
+        os.replace(self._index_path + '.tmp', self._index_path)
+        self.documents[url] = document
+        return document
+
+class nquads_cache:
+    '''Bounded LRU cache of canonical (URDNA2015) N-Quads, keyed by the hash of the JSON-LD document'''
+    def __init__(self, size=1000):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def normalize(self, document, document_loader):
+        key = hashlib.sha256(json.dumps(document, sort_keys=True, separators=(',', ':')).encode('utf-8')).digest()
+        with self._lock:
+            nquads = self._entries.get(key)
+            if nquads is not None:
+                self._entries.move_to_end(key)
+                return nquads
+        nquads = jsonld.normalize(document, {'algorithm': 'URDNA2015', 'format': 'application/n-quads', 'documentLoader': document_loader})
+        if self.size > 0:
+            with self._lock:
+                self._entries[key] = nquads
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+        return nquads
+
+def main():
+    '''
+    Caches the contexts listed in the w3c_vc section of conf/iaa.conf (or the given URLs) that are not
+    cached yet. Cached contexts are pinned: they are only fetched again with --update. --import URL FILE
+    caches the JSON-LD document in FILE (e.g., a reviewed copy) as the context of URL. Contexts that
+    cannot be fetched are logged and skipped, so that the pinned ones are still used.
+    '''
+    parser = argparse.ArgumentParser(description='JSON-LD context cache')
+    parser.add_argument('urls', nargs='*', help='the contexts to cache, instead of those of conf/iaa.conf')
+    parser.add_argument('--update', action='store_true', help='fetch the contexts again, even if cached')
+    parser.add_argument('--import', nargs=2, metavar=('URL', 'FILE'), dest='import_file', help='cache the document in FILE as the context of URL')
+    args = parser.parse_args()
+    with open('conf/iaa.conf') as f:
+        conf = json.load(f).get('w3c_vc', {})
+    cache = context_cache(conf.get('contexts_dir', 'conf/contexts'))
+    if (args.import_file):
+        url, path = args.import_file
+        with open(path) as f:
+            cache.store(url, json.load(f))
+        print("Imported " + url + " from " + path)
+        return
+    for url in args.urls or conf.get('contexts', []):
+        if (url in cache.documents and not args.update):
+            print("Already cached " + url)
+            continue
+        try:
+            cache.fetch(url)
+        except Exception as e:
+            logger.error("Couldn't fetch JSON-LD context %s: %s", url, e)
+            continue
+        print("Cached " + url)
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,7 @@
 import json
+import logging
+import threading
+import time
 try:
     from web3 import Web3
 except ImportError:
@@ -8,27 +11,96 @@ try:
 except ImportError:
      print("Couldn't import jwt, if you don't need JSON web token support that's OK")
 
+ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
+
+logger = logging.getLogger(__name__)
+
 class jwt_erc721_pep:
     def __init__(self):
         with open('conf/erc721.conf') as f:
             self.conf = json.load(f)
+        self.ownership_cache = None
         try:
             self.w3 = Web3(Web3.HTTPProvider(self.conf['web3provider']))
             with open('conf/contract/build/ERC721Metadata.abi', 'r') as myfile:
                 self.abi = myfile.read()
             self.ERC721Contract_instance = self.w3.eth.contract(abi=self.abi, address=Web3.toChecksumAddress(self.conf['iaa_sc_address']))
+            self.ownership_cache = ownership_cache(self.w3, self.ERC721Contract_instance, self.conf.get('poll_interval', 1), self.conf.get('max_staleness', 30),
+                self.conf.get('from_block', 0), self.conf.get('log_batch_size', 5000))
         except:
             print("Couldn't connect to Ethereum blockchain:" + self.conf['web3provider'])
             pass
 
+    def close(self):
+        if (self.ownership_cache):
+            self.ownership_cache.stop()
+
     def verify_bearer_erc721(self, token = None, jwt_verification_key = None ):
         try:
             decoded_token = jwt.decode(token, jwt_verification_key, algorithms='RS256', audience='sofie-iot.eu', options={"verify_exp":False})
             token_id = int(decoded_token['jti'], base = 16)
-            owner_of_token = self.ERC721Contract_instance.functions.ownerOf(token_id).call()
-            if (owner_of_token != 0):
+            owner_of_token = self.ownership_cache.owner_of(token_id, self.ERC721Contract_instance.functions.ownerOf)
+            if (owner_of_token != ZERO_ADDRESS):
                 return True, 0
             else:
                 return False, 101 #ERC-721 token has been revoked
         except:
-            return False, 100 #Token cannot be decoded
\ No newline at end of file
+            return False, 100 #Token cannot be decoded
+
+class ownership_cache:
+    '''
+    Owners of the ERC-721 tokens, kept up to date by a background thread that follows the
+    Transfer events of the contract (a burn is a transfer to the zero address), starting with
+    all the events since from_block. Lookups only call ownerOf for tokens not seen yet, or if
+    the events have not been synced for more than max_staleness seconds. If the node cannot
+    be reached then, the lookup fails, so that an owner older than max_staleness is never trusted.
+    The owner returned by ownerOf replaces the cached one, unless a Transfer event of the token
+    from a block not yet synced when ownerOf was called has been processed in the meantime.
+    '''
+    def __init__(self, w3, contract, poll_interval=1, max_staleness=30, from_block=0, log_batch_size=5000):
+        self.w3 = w3
+        self.contract = contract
+        self.poll_interval = poll_interval
+        self.max_staleness = max_staleness
+        self.log_batch_size = log_batch_size
+        self.owners = {}
+        self.transfer_blocks = {} # Token id -> block of the last Transfer event processed
+        self.next_block = from_block
+        self.synced_at = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        threading.Thread(target=self._follow_transfers, daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def owner_of(self, token_id, owner_of_function):
+        with self._lock:
+            owner = self.owners.get(token_id)
+            is_fresh = time.time() - self.synced_at <= self.max_staleness
+            fetched_from_block = self.next_block
+        if (owner is not None and is_fresh):
+            return owner
+        fetched_owner = owner_of_function(token_id).call()
+        with self._lock:
+            if (self.transfer_blocks.get(token_id, -1) < fetched_from_block):
+                self.owners[token_id] = fetched_owner
+            return self.owners[token_id]
+
+    def _follow_transfers(self):
+        while not self._stopped.is_set():
+            try:
+                latest_block = self.w3.eth.blockNumber
+                while self.next_block <= latest_block:
+                    to_block = min(self.next_block + self.log_batch_size - 1, latest_block)
+                    events = self.contract.events.Transfer.getLogs(fromBlock=self.next_block, toBlock=to_block)
+                    with self._lock:
+                        for event in events:
+                            self.owners[event['args']['_tokenId']] = event['args']['_to']
+                            self.transfer_blocks[event['args']['_tokenId']] = event.get('blockNumber', to_block)
+                        self.next_block = to_block + 1
+                with self._lock:
+                    self.synced_at = time.time()
+            except Exception as e:
+                logger.warning("Couldn't read the ERC-721 Transfer events: %s", e)
+            self._stopped.wait(self.poll_interval)
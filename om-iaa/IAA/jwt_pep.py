@@ -2,35 +2,43 @@ try:
     import jwt
 except ImportError:
      print("Couldn't import jwt, if you don't need JSON web token support that's OK")
-from jsonpath_ng import jsonpath
-from jsonpath_ng.ext import parse
+from decision_cache import decision_cache, shared_decision_cache
 
 class jwt_pep:
-    def verify_bearer(self, token=None, signing_key=None, tokens_expire = True, filter=None, proof=None): 
+    def __init__(self, cache_size=0, cache_max_ttl=0, cache_shared_path=None):
+        self.cache = decision_cache(cache_size, cache_max_ttl)
+        if (cache_shared_path):
+            try:
+                self.cache = shared_decision_cache(cache_shared_path, cache_size, cache_max_ttl)
+            except (OSError, ValueError) as e:
+                print("Couldn't open the shared decision cache, using a local one: " + str(e))
+
+    def verify_bearer(self, token=None, signing_key=None, tokens_expire = True, filter=None, proof=None, policy_id=None): 
+        if (policy_id is not None):
+            decision = self.cache.get(token, policy_id)
+            if (decision is not None):
+                return decision
+        result, error_code, expires_at = self._verify_bearer(token, signing_key, tokens_expire, filter)
+        if (policy_id is not None):
+            # Tokens that never expire (or are not checked for expiration) are cached for the max TTL only
+            self.cache.put(token, policy_id, (result, error_code), expires_at if tokens_expire else None)
+        return result, error_code
+
+    def _verify_bearer(self, token, signing_key, tokens_expire, filter):
         try:
             decoded_token = jwt.decode(token, signing_key, algorithms='RS256', options={"verify_exp":tokens_expire, "verify_aud":False})
-            if(filter):
-                if(self._filter(decoded_token, filter)):
-                    return True, 0
-                else:
-                    return False, 101 #Filter failed
-            return True, 0
         except:
-            return False, 100 #Token cannot be decoded
+            return False, 100, None #Token cannot be decoded
+        expires_at = decoded_token.get('exp') if isinstance(decoded_token.get('exp'), (int, float)) else None
+        if(filter):
+            if(self._filter(decoded_token, filter)):
+                return True, 0, expires_at
+            else:
+                return False, 101, expires_at #Filter failed
+        return True, 0, expires_at
     
-    def _filter(self, json_obj, filters):  
+    def _filter(self, json_obj, filters):
         for filter in filters:
-            jsonpath_expr = parse(filter[0])
-            found = False
-            for match in jsonpath_expr.find(json_obj):
-                if len(filter) == 2 and isinstance(filter[1], list):
-                    if match.value in filter[1]:
-                        found = True
-                elif len(filter) == 2:
-                    if match.value == filter[1]:
-                        found = True
-                else: #no value is required
-                    found = True
-            if not found:
+            if not filter.matches(json_obj):
                 return False 
         return True
\ No newline at end of file
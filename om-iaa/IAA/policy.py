@@ -0,0 +1,126 @@
+import hashlib
+import json
+import re
+
+AUTHORIZATION_TYPES = ('jwt', 'jwt-erc721', 'w3c-vc')
+
+# Paths made only of plain keys (e.g., $.aud or $.credentialSubject.id) are read directly, without JSONPath
+_KEY_PATH = re.compile(r'^\$(\.[A-Za-z_][A-Za-z0-9_\-]*)+$')
+
+class key_path:
+    def __init__(self, path):
+        self.keys = path.split('.')[1:]
+
+    def find(self, json_obj):
+        value = json_obj
+        for key in self.keys:
+            if not isinstance(value, dict) or key not in value:
+                return []
+            value = value[key]
+        return [value]
+
+class jsonpath_expression:
+    def __init__(self, path):
+        from jsonpath_ng.ext import parse
+        self.expression = parse(path)
+
+    def find(self, json_obj):
+        return [match.value for match in self.expression.find(json_obj)]
+
+class json_filter:
+    '''
+    A [path] or [path, value(s)] filter of the IAA configuration, with its path compiled once.
+    It matches if the path is found and, if values are given, if one of the values found is among them.
+    '''
+    def __init__(self, filter):
+        self.path = filter[0]
+        self.accessor = key_path(self.path) if _KEY_PATH.match(self.path) else jsonpath_expression(self.path)
+        self.has_values = len(filter) == 2
+        self.values = filter[1] if self.has_values and isinstance(filter[1], list) else [filter[1]] if self.has_values else None
+
+    def matches(self, json_obj):
+        for value in self.accessor.find(json_obj):
+            if not self.has_values or value in self.values:
+                return True
+        return False
+
+class resource_router:
+    '''
+    Finds the policy of a request path. Exact paths are looked up first, then the longest
+    prefix among the resources ending with "/*" (walking a trie of path segments), then "default".
+    '''
+    def __init__(self, resources):
+        self.exact = {}
+        self.prefixes = {}
+        self.default = resources.get('default', {})
+        for path, resource in resources.items():
+            if path == 'default':
+                continue
+            if path.endswith('/*'):
+                node = self.prefixes
+                for segment in self._segments(path[:-2]):
+                    node = node.setdefault(segment, {})
+                node[None] = resource
+            else:
+                self.exact[path] = resource
+
+    def route(self, path):
+        resource = self.exact.get(path)
+        if resource is not None:
+            return resource
+        resource = self.default
+        node = self.prefixes
+        if None in node:
+            resource = node[None]
+        for segment in self._segments(path or ''):
+            node = node.get(segment)
+            if node is None:
+                break
+            if None in node:
+                resource = node[None]
+        return resource
+
+    def _segments(self, path):
+        return [segment for segment in path.split('/') if segment]
+
+def compile_policies(conf):
+    '''
+    Compiles the resources of the IAA configuration: signing keys are loaded and filters
+    are parsed once, so that requests only need to verify their tokens. The configuration
+    itself is not modified. Raises ValueError if a resource is invalid.
+    '''
+    resources = {}
+    key_files = set()
+    for path, resource in conf['resources'].items():
+        try:
+            resources[path] = _compile_resource(resource)
+        except (KeyError, TypeError, ValueError, OSError) as e:
+            raise ValueError("Invalid resource " + path + ": " + str(e))
+        if 'signing_key_file' in resource.get('authorization', {}):
+            key_files.add(resource['authorization']['signing_key_file'])
+    router = resource_router(resources)
+    router.key_files = sorted(key_files)
+    return router
+
+def _compile_resource(resource):
+    resource = dict(resource)
+    if 'proxy' in resource and 'proxy_pass' not in resource['proxy']:
+        raise ValueError("proxy_pass is missing")
+    if 'authorization' in resource:
+        authorization = dict(resource['authorization'])
+        if authorization.get('type') not in AUTHORIZATION_TYPES:
+            raise ValueError("unknown authorization type " + str(authorization.get('type')))
+        if 'signing_key' not in authorization and 'signing_key_file' not in authorization:
+            raise ValueError("signing_key or signing_key_file is missing")
+        if authorization['type'] == 'jwt' and 'tokens_expire' not in authorization:
+            raise ValueError("tokens_expire is missing")
+        if 'signing_key' not in authorization and 'signing_key_file' in authorization:
+            with open(authorization['signing_key_file'], mode='rb') as file:
+                authorization['signing_key'] = file.read()
+        authorization['filters'] = [json_filter(filter) for filter in authorization.get('filters') or []]
+        # Identifies the policy in the decision caches: it only changes if the policy or its key change
+        policy_hash = hashlib.sha256(json.dumps(resource['authorization'], sort_keys=True).encode())
+        policy_hash.update(authorization.get('signing_key', b'') if isinstance(authorization.get('signing_key'), bytes) else str(authorization.get('signing_key')).encode())
+        authorization['policy_id'] = policy_hash.hexdigest()
+        resource['authorization'] = authorization
+    return resource
@@ -1,5 +1,3 @@
-from jsonpath_ng import jsonpath
-from jsonpath_ng.ext import parse
 try:
     import nacl.signing
     import nacl.encoding
@@ -10,11 +8,17 @@ try:
     from pyld.jsonld import JsonLdProcessor
 except ImportError:
      print("Couldn't import pyld, if you don't need W3C-VC support that's OK")
+from jsonld_cache import context_cache, nquads_cache
 import hashlib
 import json
 
 class w3c_vc_pep:
+    def __init__(self, contexts_dir='conf/contexts', allow_remote_contexts=False, contexts=(), nquads_cache_size=1000):
+        self.context_cache = context_cache(contexts_dir, allow_remote_contexts, contexts)
+        self.nquads_cache = nquads_cache(nquads_cache_size)
+
     def verify_w3c_vc(self, vc=None, signing_key=None, filter=None, documentloader=None): 
+        documentloader = documentloader or self.context_cache.load_document
         singed_credential = json.loads(vc)
         jws_header = b'{"alg":"EdDSA","b64":false,"crit":["b64"]}'
         proof =  singed_credential['proof']
@@ -23,8 +27,8 @@ class w3c_vc_pep:
         del singed_credential['proof']
         del proof['jws']
 
-        normalized_doc   = jsonld.normalize(singed_credential , {'algorithm': 'URDNA2015', 'format': 'application/n-quads'})
-        normalized_proof = jsonld.normalize(proof, {'algorithm': 'URDNA2015', 'format': 'application/n-quads'})
+        normalized_doc   = self.nquads_cache.normalize(singed_credential, documentloader)
+        normalized_proof = self.nquads_cache.normalize(proof, documentloader)
         doc_hash         = hashlib.sha256()
         proof_hash       = hashlib.sha256()
 
@@ -41,25 +45,12 @@ class w3c_vc_pep:
                     return True, 0
                 else:
                     return False, 101 #Filter failed
-            return True
+            return True, 0
         except:
             return False, 100 #VC signature verification failed
     
-    def _filter(self, json_obj, filters): 
+    def _filter(self, json_obj, filters):
         for filter in filters:
-            jsonpath_expr = parse(filter[0])
-            found = False
-            for match in jsonpath_expr.find(json_obj):
-                if len(filter) == 2 and isinstance(filter[1], list):
-                    if match.value in filter[1]:
-                        found = True
-                elif len(filter) == 2:
-                    if match.value == filter[1]:
-                        found = True
-                else: #no value is required
-                    found = True
-            if not found:
-                print("Not found:")
-                print(filter)
+            if not filter.matches(json_obj):
                 return False 
         return True
\ No newline at end of file
@@ -0,0 +1,124 @@
+'''
+Load test of the IAA gateway. Run from the om-iaa directory:
+
+    python3 tests/benchmarks/loadtest.py [--mode wsgi|asgi] [--workers 1] [--concurrency 8] [--requests 2000] [--erc721]
+
+It starts the local upstream (tests/http_server.py) and the IAA (IAA/iaa.py, served as WSGI or
+ASGI), then sends the requests of each scenario from `concurrency` client threads and reports
+the throughput and latency percentiles. The proxy overhead is the latency of the proxied requests
+without authorization minus the latency of the same requests sent to the upstream directly.
+With --erc721, a ganache-cli chain is started and a token is minted, as in test_erc721_proxy.py.
+'''
+import argparse
+import base64
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+sys.path.insert(0, 'tests')
+sys.path.insert(0, 'tests/benchmarks')
+from microbench import jwt_token
+from report     import summarize, print_table
+from test_w3c_vc_proxy import sofie_credential_signed
+
+IAA_URL = 'http://127.0.0.1:9000'
+UPSTREAM_URL = 'http://127.0.0.1:8080'
+GANACHE_MNEMONIC = 'myth like bonus scare over problem client lizard pioneer submit female collect' # Deploys the contract at the address of conf/erc721.conf
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Nothing is listening on port " + str(port))
+
+def start_chain():
+    from web3 import Web3
+    chain = subprocess.Popen(['ganache-cli', '-m', GANACHE_MNEMONIC], stdout=subprocess.DEVNULL)
+    wait_for_port(8545)
+    w3 = Web3(Web3.HTTPProvider("HTTP://127.0.0.1:8545"))
+    with open('conf/contract/build/ERC721Metadata.bin', 'r') as myfile:
+        binfile = myfile.read()
+    with open('conf/contract/build/ERC721Metadata.abi', 'r') as myfile:
+        abi = myfile.read()
+    account = w3.eth.accounts[0]
+    tx_hash = w3.eth.contract(abi=abi, bytecode=binfile).constructor("Sofie Access Token", "SAT").transact({'from': account})
+    address = w3.eth.waitForTransactionReceipt(tx_hash).contractAddress
+    jti = uuid.uuid4().hex
+    token = jwt_token(jti)
+    tx_hash = w3.eth.contract(abi=abi, address=address).functions.mint(account, int(jti, base=16), token).transact({'from': account})
+    w3.eth.waitForTransactionReceipt(tx_hash)
+    return chain, token
+
+def run(name, url, headers_list, concurrency, count):
+    '''Sends count GET requests, using the headers of headers_list in turn'''
+    sessions = threading.local()
+    def send(i):
+        if not hasattr(sessions, 'session'):
+            sessions.session = requests.Session()
+        start = time.perf_counter()
+        response = sessions.session.get(url, headers=headers_list[i % len(headers_list)])
+        return time.perf_counter() - start, response.status_code == 200
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, range(min(concurrency, count)))) # Warm up the connections
+        start = time.perf_counter()
+        results = list(executor.map(send, range(count)))
+        elapsed = time.perf_counter() - start
+    return summarize(name, [latency for latency, _ in results], elapsed, len([ok for _, ok in results if not ok]))
+
+def main():
+    parser = argparse.ArgumentParser(description='IAA load test')
+    parser.add_argument('--mode', choices=['wsgi', 'asgi'], default='wsgi')
+    parser.add_argument('--workers', type=int, default=1, help='IAA worker processes (ASGI only)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--erc721', action='store_true', help='also test jwt-erc721 against a ganache-cli chain')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args()
+
+    processes = [subprocess.Popen([sys.executable, 'tests/http_server.py'])]
+    try:
+        erc721_token = None
+        if (args.erc721):
+            chain, erc721_token = start_chain()
+            processes.append(chain)
+        env = dict(os.environ, IAA_SERVER_MODE=args.mode, IAA_WORKERS=str(args.workers))
+        processes.append(subprocess.Popen([sys.executable, 'IAA/iaa.py'], env=env))
+        wait_for_port(8080)
+        wait_for_port(9000)
+
+        token = jwt_token()
+        distinct_tokens = [jwt_token() for i in range(min(args.requests, 1000))]
+        vc = base64.urlsafe_b64encode(json.dumps(sofie_credential_signed).encode()).decode()
+        scenarios = [
+            ('upstream (direct)', UPSTREAM_URL + '/', [{}]),
+            ('no authorization (proxy)', IAA_URL + '/', [{}]),
+            ('jwt', IAA_URL + '/secure/jwt-noproxy', [{'Authorization': 'Bearer ' + token}]),
+            ('jwt (distinct tokens)', IAA_URL + '/secure/jwt-noproxy', [{'Authorization': 'Bearer ' + t} for t in distinct_tokens]),
+            ('w3c-vc (proxy)', IAA_URL + '/secure/w3c-vc', [{'Authorization': 'Bearer-W3C-VC ' + vc}]),
+        ]
+        if (erc721_token):
+            scenarios.append(('jwt-erc721 (proxy)', IAA_URL + '/secure/jwt-erc721', [{'Authorization': 'Bearer-ERC721 ' + erc721_token}]))
+        results = [run(name, url, headers_list, args.concurrency, args.requests) for name, url, headers_list in scenarios]
+        overhead = {'p50_ms': results[1]['p50_ms'] - results[0]['p50_ms'], 'p99_ms': results[1]['p99_ms'] - results[0]['p99_ms']}
+        if (args.json):
+            print(json.dumps({'mode': args.mode, 'workers': args.workers, 'concurrency': args.concurrency, 'results': results, 'proxy_overhead': overhead}, indent=2))
+        else:
+            print_table(results)
+            print('proxy overhead: p50 %.3f ms, p99 %.3f ms' % (overhead['p50_ms'], overhead['p99_ms']))
+    finally:
+        for process in processes:
+            process.terminate()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+'''
+Microbenchmarks of the PEPs, without HTTP. Run from the om-iaa directory:
+
+    python3 tests/benchmarks/microbench.py [--iterations 1000] [--json]
+
+The policies and keys are those of conf/iaa.conf; the W3C VC is the one of the functional tests.
+'''
+import argparse
+import json
+import sys
+import time
+import uuid
+
+sys.path.insert(0, 'IAA')
+sys.path.insert(0, 'tests')
+sys.path.insert(0, 'tests/benchmarks')
+import jwt
+from jwt_pep    import jwt_pep
+from w3c_vc_pep import w3c_vc_pep
+from policy     import compile_policies
+from report     import summarize, print_table
+from test_w3c_vc_proxy import sofie_credential_signed
+
+def measure(name, function, iterations):
+    function() # Warm up
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return summarize(name, samples)
+
+def jwt_token(jti = None):
+    with open('tests/keys/as_private_key.pem', mode='rb') as file:
+        signing_key = file.read()
+    token = jwt.encode({'aud': 'sofie-iot.eu', 'jti': jti or uuid.uuid4().hex, 'sub': 'benchmark'}, signing_key, algorithm='RS256')
+    return token.decode() if isinstance(token, bytes) else token
+
+def main():
+    parser = argparse.ArgumentParser(description='IAA PEP microbenchmarks')
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args()
+    with open('conf/iaa.conf') as f:
+        conf = json.load(f)
+    router = compile_policies(conf)
+    jwt_policy = router.route('/secure/jwt-noproxy')['authorization']
+    vc_policy = router.route('/secure/w3c-vc')['authorization']
+    vc_conf = conf.get('w3c_vc', {})
+    token = jwt_token()
+    decoded_token = jwt.decode(token, jwt_policy['signing_key'], algorithms='RS256', options={"verify_aud":False})
+    vc = json.dumps(sofie_credential_signed)
+
+    uncached_jwt_pep = jwt_pep()
+    cached_jwt_pep = jwt_pep(10000, 300)
+    uncached_vc_pep = w3c_vc_pep(vc_conf.get('contexts_dir', 'conf/contexts'), vc_conf.get('allow_remote_contexts', False), vc_conf.get('contexts', []), 0)
+    cached_vc_pep = w3c_vc_pep(vc_conf.get('contexts_dir', 'conf/contexts'), False, (), vc_conf.get('nquads_cache_size', 1000))
+    try:
+        vc_is_valid = uncached_vc_pep.verify_w3c_vc(vc, vc_policy['signing_key'], vc_policy['filters']) == (True, 0)
+    except Exception:
+        vc_is_valid = False
+    if (not vc_is_valid):
+        print("The W3C VC cannot be verified, are the JSON-LD contexts cached? Skipping w3c_vc_pep.verify_w3c_vc")
+
+    results = [
+        measure('jwt_pep.verify_bearer', lambda: uncached_jwt_pep.verify_bearer(token, jwt_policy['signing_key'], jwt_policy['tokens_expire'], jwt_policy['filters']), args.iterations),
+        measure('jwt_pep.verify_bearer (cached)', lambda: cached_jwt_pep.verify_bearer(token, jwt_policy['signing_key'], jwt_policy['tokens_expire'], jwt_policy['filters'], policy_id=jwt_policy['policy_id']), args.iterations),
+        measure('jwt_pep._filter (key path)', lambda: uncached_jwt_pep._filter(decoded_token, jwt_policy['filters']), args.iterations * 10),
+        measure('w3c_vc_pep._filter (JSONPath)', lambda: uncached_vc_pep._filter(sofie_credential_signed, vc_policy['filters']), args.iterations),
+    ]
+    if (vc_is_valid):
+        results += [
+            measure('w3c_vc_pep.verify_w3c_vc', lambda: uncached_vc_pep.verify_w3c_vc(vc, vc_policy['signing_key'], vc_policy['filters']), max(args.iterations // 10, 1)),
+            measure('w3c_vc_pep.verify_w3c_vc (cached)', lambda: cached_vc_pep.verify_w3c_vc(vc, vc_policy['signing_key'], vc_policy['filters']), args.iterations),
+        ]
+    if (args.json):
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+def percentile(sorted_samples, p):
+    if not sorted_samples:
+        return 0.0
+    index = min(int(round(p / 100.0 * (len(sorted_samples) - 1))), len(sorted_samples) - 1)
+    return sorted_samples[index]
+
+def summarize(name, samples, elapsed=None, errors=0):
+    '''
+    Summary of a benchmark: samples are latencies in seconds, and elapsed is the wall time of
+    the run (the throughput of sequential runs is computed from the sum of the latencies)
+    '''
+    samples = sorted(samples)
+    elapsed = elapsed if elapsed is not None else sum(samples)
+    return {
+        'name': name,
+        'count': len(samples),
+        'errors': errors,
+        'per_second': len(samples) / elapsed if elapsed > 0 else 0.0,
+        'mean_ms': 1000 * sum(samples) / len(samples) if samples else 0.0,
+        'p50_ms': 1000 * percentile(samples, 50),
+        'p90_ms': 1000 * percentile(samples, 90),
+        'p99_ms': 1000 * percentile(samples, 99),
+    }
+
+def print_table(rows):
+    print('%-36s %8s %7s %11s %9s %9s %9s %9s' % ('benchmark', 'count', 'errors', 'ops/s', 'mean ms', 'p50 ms', 'p90 ms', 'p99 ms'))
+    for row in rows:
+        print('%-36s %8d %7d %11.1f %9.3f %9.3f %9.3f %9.3f' % (row['name'], row['count'], row['errors'], row['per_second'],
+            row['mean_ms'], row['p50_ms'], row['p90_ms'], row['p99_ms']))
@@ -0,0 +1,104 @@
+import sys
+import time
+import pytest
+sys.path.insert(0, 'IAA')
+from jwt_erc721_pep import ownership_cache, ZERO_ADDRESS
+
+OWNER = '0x1Df62f291b2E969fB0849d99D9Ce41e2F137006e'
+NEW_OWNER = '0x471e0575bFC76d7e189ab3354E0ecb70FCbf3E46'
+
+class FakeChain:
+    '''The blocks of the chain, as lists of (token id, new owner) Transfer events'''
+    def __init__(self):
+        self.blocks = [[]]
+        self.reachable = True
+        self.logs_available = True
+        self.eth = self
+        self.events = self
+        self.Transfer = self
+
+    @property
+    def blockNumber(self):
+        if (not self.reachable):
+            raise IOError('Node not reachable')
+        return len(self.blocks) - 1
+
+    def getLogs(self, fromBlock, toBlock):
+        if (not self.logs_available):
+            raise IOError('Logs not available')
+        return [{'args': {'_tokenId': token_id, '_to': owner}, 'blockNumber': fromBlock + i} for i, block in enumerate(self.blocks[fromBlock:toBlock + 1]) for token_id, owner in block]
+
+def owner_of_function(owners, chain):
+    def owner_of(token_id):
+        class call:
+            def call(self):
+                if (not chain.reachable):
+                    raise IOError('Node not reachable')
+                return owners[token_id]
+        return call()
+    return owner_of
+
+def wait_for_block(cache, block):
+    deadline = time.time() + 5
+    while cache.next_block <= block and time.time() < deadline:
+        time.sleep(0.01)
+
+class TestOwnershipCache:
+    def test_transfer_updates_owner(self):
+        chain = FakeChain()
+        chain.blocks.append([(1, OWNER)])
+        cache = ownership_cache(chain, chain, poll_interval=0.01)
+        wait_for_block(cache, 1)
+        assert(cache.owner_of(1, owner_of_function({}, chain)) == OWNER)
+        chain.blocks.append([(1, ZERO_ADDRESS)]) # Burn
+        wait_for_block(cache, 2)
+        assert(cache.owner_of(1, owner_of_function({}, chain)) == ZERO_ADDRESS)
+        cache.stop()
+
+    def test_unseen_token_uses_owner_of(self):
+        chain = FakeChain()
+        cache = ownership_cache(chain, chain, poll_interval=0.01)
+        wait_for_block(cache, 0)
+        assert(cache.owner_of(2, owner_of_function({2: OWNER}, chain)) == OWNER)
+        cache.stop()
+
+    def test_stale_owner_fails_closed(self):
+        chain = FakeChain()
+        chain.blocks.append([(1, OWNER)])
+        cache = ownership_cache(chain, chain, poll_interval=0.01, max_staleness=0.1)
+        wait_for_block(cache, 1)
+        chain.reachable = False
+        time.sleep(0.2)
+        with pytest.raises(IOError):
+            cache.owner_of(1, owner_of_function({1: OWNER}, chain))
+        chain.reachable = True
+        assert(cache.owner_of(1, owner_of_function({1: OWNER}, chain)) == OWNER)
+        cache.stop()
+
+    def test_stale_owner_is_replaced(self):
+        chain = FakeChain()
+        chain.blocks.append([(1, OWNER)])
+        cache = ownership_cache(chain, chain, poll_interval=0.01, max_staleness=0.1)
+        wait_for_block(cache, 1)
+        # The token is transferred while the Transfer events cannot be read
+        chain.logs_available = False
+        chain.blocks.append([(1, NEW_OWNER)])
+        time.sleep(0.2)
+        assert(cache.owner_of(1, owner_of_function({1: NEW_OWNER}, chain)) == NEW_OWNER)
+        assert(cache.owners[1] == NEW_OWNER)
+        cache.stop()
+
+    def test_transfer_during_owner_of_is_kept(self):
+        chain = FakeChain()
+        cache = ownership_cache(chain, chain, poll_interval=0.01)
+        wait_for_block(cache, 0)
+        def owner_of(token_id):
+            class call:
+                def call(self):
+                    # The node answers with the owner before the transfer, which is processed in the meantime
+                    chain.blocks.append([(2, NEW_OWNER)])
+                    wait_for_block(cache, 1)
+                    return OWNER
+            return call()
+        assert(cache.owner_of(2, owner_of) == NEW_OWNER)
+        cache.stop()
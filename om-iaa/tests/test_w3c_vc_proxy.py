@@ -35,7 +35,7 @@ sofie_credential_signed = {
     "created": "2020-08-12T23:21:09Z",
     "verificationMethod": "did:nacl:E390CF3B5B93E921C45ED978737D89F61B8CAFF9DE76BFA5F63DA20386BCCA3B#key0",
     "proofPurpose": "assertionMethod",
-    "jws": "eyJhbGciOiJFZERTQSIsImI2NCI6ZmFsc2UsImNyaXQiOlsiYjY0Il19..4XkJwAtDZit6cYb4WoSKPAr8C4ex3NBZnLMAjcETq3TzfBhBQ1HI5tOXhwoZeQdlSmlaMlBzT2E3F9EMIXz0AA"
+    "jws": "eyJhbGciOiJFZERTQSIsImI2NCI6ZmFsc2UsImNyaXQiOlsiYjY0Il19..Ff_m-SeQ3RK3mIUyuBv_tSIu2pnLWKiFG4df1xKg6YSASl316dknydUJQzvltjfTf6k6Z6GVRay7-tnjo5t-Cw"
   }
 }
 
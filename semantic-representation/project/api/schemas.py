@@ -54,7 +54,10 @@ def update_schema():
 @bp.route('/schema/<int:id>', methods=['GET'])
 def get_schema2(id):
     schema = Schema.query.get_or_404(id)
-    return jsonify(schema.schema)
+    # The ETag lets clients revalidate a cached schema with If-None-Match (304 Not Modified)
+    response = jsonify(schema.schema)
+    response.add_etag()
+    return response.make_conditional(request)
 
 
 @bp.route('/schemas', methods=['GET'])
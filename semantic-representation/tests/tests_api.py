@@ -144,6 +144,29 @@ class SemanticRepresentationAPI(unittest.TestCase):
         # Clean db
         self.remove_schemas()
 
+    '''
+    This function tests the revalidation of a cached schema.
+    A schema is retrieved with its ETag, which is sent back with If-None-Match: the component answers 304 until the schema is updated
+    '''
+    def test_get_schema_etag(self):
+        requests.post(url=self.schema_url, json={'name': self.schemas[0]['$id'], 'schema': self.schemas[0]})
+        success = requests.get(self.baseurl + '/api/schema/1')
+        etag = success.headers.get('ETag')
+        self.assertEqual(success.status_code, 200)
+        self.assertIsNotNone(etag)
+        not_modified = requests.get(self.baseurl + '/api/schema/1', headers={'If-None-Match': etag})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.headers.get('ETag'), etag)
+        # Update the schema: the old ETag does not match anymore
+        updated_schema = dict(self.schemas[0], title='Updated schema')
+        requests.put(url=self.schema_url, json={'name': self.schemas[0]['$id'], 'schema': updated_schema})
+        modified = requests.get(self.baseurl + '/api/schema/1', headers={'If-None-Match': etag})
+        self.assertEqual(modified.status_code, 200)
+        self.assertEqual(json.loads(modified.text), str(updated_schema))
+        self.assertNotEqual(modified.headers.get('ETag'), etag)
+        # Clean db
+        self.remove_schemas()
+
     '''
     This test shows the message validation functionality of the SR component.
     First is added the schema to validate the messages against.